@@ -0,0 +1,205 @@
+"""
+多账号分流上传
+
+一个 OAuth 账号每天的 Photos Library API 配额有限，比赛日的截图量会超出。
+MultiAccountUploader 持有多个 GooglePhotosUploader（各自的 token 文件），
+按游戏名称把截图分配到账号：显式映射优先，否则按游戏名称的稳定哈希分配，
+同一游戏总是上传到同一个账号的相册中。每个账号单独统计当天的请求数，
+分配到的账号配额用完时依次使用下一个账号，总吞吐量随账号数增加。
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+from uploader import GooglePhotosUploader, BATCH_CREATE_LIMIT
+
+# Photos Library API 每个账号每天的请求数上限
+DAILY_REQUEST_LIMIT = 10000
+
+# 配额在太平洋时间午夜重置，这里按固定的 UTC-8 计算日期
+QUOTA_TIMEZONE = datetime.timezone(datetime.timedelta(hours=-8))
+
+
+def quota_day():
+    return datetime.datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+
+def batch_requests(count):
+    """批量上传 count 个文件需要的请求数：每个文件上传一次，每 50 个文件一次 batchCreate"""
+    return count + -(-count // BATCH_CREATE_LIMIT)
+
+
+def stable_shard(key, count):
+    """按 key 的 SHA-1 选择分片，不受 Python 字符串哈希随机化影响，重启后结果不变"""
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count
+
+
+class QuotaTracker:
+    """统计一个账号当天已使用的请求数，设置了 path 时写入文件，重启后继续累计"""
+
+    def __init__(self, limit=DAILY_REQUEST_LIMIT, path=None, today=quota_day):
+        self.limit = limit
+        self.path = path
+        self.today = today
+        self.day = today()
+        self.used = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('day') == self.day:
+                    self.used = state.get('used', 0)
+            except ValueError:
+                pass
+
+    def _roll(self):
+        day = self.today()
+        if day != self.day:
+            self.day = day
+            self.used = 0
+
+    def remaining(self):
+        with self._lock:
+            self._roll()
+            return max(0, self.limit - self.used)
+
+    def charge(self, requests):
+        """记录 requests 个请求"""
+        with self._lock:
+            self._roll()
+            self.used += requests
+            if self.path:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump({'day': self.day, 'used': self.used}, f)
+
+
+class Account:
+    def __init__(self, name, uploader, quota):
+        self.name = name
+        self.uploader = uploader
+        self.quota = quota
+
+
+class MultiAccountUploader:
+    def __init__(self, accounts, game_accounts=None):
+        """
+        初始化多账号上传器
+
+        Args:
+            accounts (list): [Account, ...]，顺序决定哈希分配和配额用完后的接替顺序
+            game_accounts (dict): 游戏名称 -> 账号名称 的显式映射
+        """
+        if not accounts:
+            raise ValueError('至少需要一个账号')
+        self.accounts = accounts
+        self.game_accounts = game_accounts or {}
+        self._by_name = {account.name: account for account in accounts}
+        # 上传 token -> 账号，batchCreate 必须使用上传文件时的同一个账号
+        self._token_accounts = {}
+        self._token_lock = threading.Lock()
+        # 游戏名称只需要解析一次，所有账号共用同一个缓存
+        primary = accounts[0].uploader
+        for account in accounts[1:]:
+            account.uploader._game_names = primary._game_names
+            account.uploader._name_lock = primary._name_lock
+
+    @classmethod
+    def from_config(cls, account_configs, game_accounts=None, daily_limit=DAILY_REQUEST_LIMIT):
+        """
+        按配置创建账号，每个账号依次完成认证
+
+        Args:
+            account_configs (list): [{'name': ..., 'credentials': ..., 'token': ...}, ...]
+            game_accounts (dict): 游戏名称 -> 账号名称
+            daily_limit (int): 每个账号每天的请求数上限
+        """
+        accounts = []
+        for config in account_configs:
+            token_path = config.get('token', f'token.{config["name"]}.pickle')
+            uploader = GooglePhotosUploader(config.get('credentials', 'credentials.json'), token_path)
+            quota = QuotaTracker(config.get('daily_limit', daily_limit),
+                                 path=os.path.splitext(token_path)[0] + '.quota.json')
+            accounts.append(Account(config['name'], uploader, quota))
+        return cls(accounts, game_accounts)
+
+    def account_for(self, game_name, requests=1):
+        """
+        选择游戏使用的账号：显式映射 > 稳定哈希；该账号配额不足时依次尝试之后的账号
+
+        Returns:
+            Account: 配额都用完时返回 None
+        """
+        mapped = self._by_name.get(self.game_accounts.get(game_name))
+        start = self.accounts.index(mapped) if mapped else stable_shard(game_name, len(self.accounts))
+        for offset in range(len(self.accounts)):
+            account = self.accounts[(start + offset) % len(self.accounts)]
+            if account.quota.remaining() >= requests:
+                if offset:
+                    print(f'账号 {self.accounts[start].name} 今日配额已用完，'
+                          f'{game_name} 改用账号 {account.name}')
+                return account
+        print(f'所有账号今日配额都已用完，无法上传: {game_name}')
+        return None
+
+    def resolve_game_name(self, file_path):
+        return self.accounts[0].uploader.resolve_game_name(file_path)
+
+    def upload_screenshot(self, file_path):
+        """上传截图到游戏所属账号的相册，需要 2 个请求（上传字节 + batchCreate）"""
+        account = self.account_for(self.resolve_game_name(file_path), 2)
+        if account is None:
+            return False
+        account.quota.charge(2)
+        return account.uploader.upload_screenshot(file_path)
+
+    def upload_screenshots(self, file_paths):
+        """
+        批量上传截图：按游戏分组，每个游戏交给所属账号的批量上传
+
+        Returns:
+            list: 成功上传的文件路径
+        """
+        groups = {}
+        for file_path in file_paths:
+            groups.setdefault(self.resolve_game_name(file_path), []).append(file_path)
+        created = []
+        for game_name, paths in groups.items():
+            requests = batch_requests(len(paths))
+            account = self.account_for(game_name, requests)
+            if account is None:
+                continue
+            account.quota.charge(requests)
+            created.extend(account.uploader.upload_screenshots(paths))
+        return created
+
+    def _upload_media(self, file_path):
+        """上传文件字节，记录 token 属于哪个账号（token 只能在同一账号中使用）"""
+        account = self.account_for(self.resolve_game_name(file_path))
+        if account is None:
+            return None
+        account.quota.charge(1)
+        upload_token = account.uploader._upload_media(file_path)
+        if upload_token:
+            with self._token_lock:
+                self._token_accounts[upload_token] = account
+        return upload_token
+
+    def create_media_items(self, game_name, uploads):
+        """把已上传的文件添加到各自账号中的游戏相册"""
+        groups = {}
+        with self._token_lock:
+            for file_path, upload_token in uploads:
+                account = self._token_accounts.pop(upload_token, None)
+                if account is None:
+                    print(f'找不到上传 token 所属的账号，跳过: {file_path}')
+                    continue
+                groups.setdefault(account.name, []).append((file_path, upload_token))
+        created = []
+        for name, account_uploads in groups.items():
+            account = self._by_name[name]
+            account.quota.charge(-(-len(account_uploads) // BATCH_CREATE_LIMIT))
+            created.extend(account.uploader.create_media_items(game_name, account_uploads))
+        return created
@@ -0,0 +1,319 @@
+"""
+GooglePhotosUploader 的 asyncio 版本
+
+基于 aiohttp 直接调用 Photos Library REST 接口，所有网络请求都不阻塞事件循环，
+单线程即可同时进行上百个上传。行为与同步版本一致：
+- 按路径解析游戏名称（Steam API），同一目录只解析一次
+- 相册不存在时自动创建，同一相册只创建一次；相册接近上限时切换到 "<游戏名称> (2)" 等新相册
+- 上传文件字节与解析相册并行，只在 batchCreate 前汇合
+- upload_screenshot 返回 True/False，错误只打印不抛出
+"""
+import asyncio
+import os
+import aiohttp
+from google.auth.transport.requests import Request
+from uploader import (load_credentials, steam_app_id_from_path, steam_name_from_appdetails,
+                      folder_name_from_path, DEFAULT_GAME_NAME, STEAM_APPDETAILS_URL,
+                      BATCH_CREATE_LIMIT, AlbumIndex)
+
+PHOTOS_API_BASE = 'https://photoslibrary.googleapis.com'
+
+# 上传文件时每次读取的块大小，文件不会整个读入内存
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+class AsyncGooglePhotosUploader:
+    def __init__(self, credentials, session=None, max_concurrency=100,
+                 api_base=PHOTOS_API_BASE, steam_appdetails_url=STEAM_APPDETAILS_URL):
+        """
+        初始化异步上传器，需要在事件循环中通过 async with 使用或调用 open()
+
+        Args:
+            credentials: google.oauth2.credentials.Credentials 认证信息
+            session (aiohttp.ClientSession): 外部传入的会话，为 None 时自行创建
+            max_concurrency (int): 同时进行的 HTTP 请求数上限
+            api_base (str): Photos Library API 地址，测试时可指向本地服务
+            steam_appdetails_url (str): Steam appdetails 接口地址
+        """
+        self.credentials = credentials
+        self.api_base = api_base.rstrip('/')
+        self.steam_appdetails_url = steam_appdetails_url
+        self.max_concurrency = max_concurrency
+        self.album_index = AlbumIndex()
+        self.albums = self.album_index.albums
+        self._session = session
+        self._own_session = session is None
+        self._semaphore = None
+        self._refresh_lock = None
+        self._album_locks = {}
+        self._game_names = {}
+        self._name_tasks = {}
+
+    @classmethod
+    async def create(cls, credentials_path='credentials.json', token_path='token.pickle', **kwargs):
+        """
+        使用与同步版本相同的 token 文件创建上传器并加载相册
+        首次认证需要打开浏览器，放在线程中执行
+        """
+        credentials = await asyncio.to_thread(load_credentials, credentials_path, token_path)
+        uploader = cls(credentials, **kwargs)
+        await uploader.open()
+        await uploader.load_albums()
+        return uploader
+
+    async def open(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._refresh_lock = asyncio.Lock()
+
+    async def close(self):
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _auth_headers(self):
+        """返回带访问令牌的请求头，令牌过期时在线程中刷新"""
+        if not self.credentials.valid:
+            async with self._refresh_lock:
+                if not self.credentials.valid:
+                    await asyncio.to_thread(self.credentials.refresh, Request())
+        return {'Authorization': f'Bearer {self.credentials.token}'}
+
+    async def _request_json(self, method, path, **kwargs):
+        """调用 Photos Library API 并返回 JSON，HTTP 错误抛出 aiohttp.ClientResponseError"""
+        headers = await self._auth_headers()
+        async with self._semaphore:
+            async with self._session.request(method, self.api_base + path,
+                                             headers=headers, **kwargs) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    async def load_albums(self):
+        """加载所有相册信息"""
+        try:
+            params = {'pageSize': 50}
+            while True:
+                response = await self._request_json('GET', '/v1/albums', params=params)
+                for album in response.get('albums', []):
+                    self.album_index.add(album['title'], album['id'],
+                                         int(album.get('mediaItemsCount', 0)))
+                if not response.get('nextPageToken'):
+                    break
+                params['pageToken'] = response['nextPageToken']
+        except aiohttp.ClientError as error:
+            print(f'加载相册时出错: {error}')
+
+    async def create_album(self, title):
+        """创建新相册"""
+        try:
+            if title in self.albums:
+                print(f'相册已存在: {title}')
+                return self.albums[title]
+            album = await self._request_json('POST', '/v1/albums', json={'album': {'title': title}})
+            self.albums[title] = album['id']
+            print(f'成功创建相册: {title}')
+            return album['id']
+        except aiohttp.ClientError as error:
+            print(f'创建相册时出错: {error}')
+            return None
+
+    async def get_game_name_from_path(self, file_path):
+        """与 GooglePhotosUploader.get_game_name_from_path 相同，Steam API 请求不阻塞"""
+        try:
+            game_id = steam_app_id_from_path(file_path)
+            if game_id:
+                try:
+                    async with self._semaphore:
+                        async with self._session.get(self.steam_appdetails_url,
+                                                     params={'appids': game_id}) as response:
+                            if response.status == 200:
+                                data = await response.json(content_type=None)
+                                game_name = steam_name_from_appdetails(game_id, data)
+                                if game_name:
+                                    print(f'从Steam API获取到游戏名称: {game_name}')
+                                    return game_name
+                except Exception as e:
+                    print(f"从Steam API获取游戏名称时出错: {e}")
+                return game_id
+            return folder_name_from_path(file_path)
+        except Exception as e:
+            print(f"提取游戏名称时出错: {e}")
+            return DEFAULT_GAME_NAME
+
+    async def resolve_game_name(self, file_path):
+        """
+        带缓存的游戏名称解析，同一目录下的文件只解析一次
+        并发的同目录请求共享同一个解析任务；Steam API 失败返回的游戏ID不缓存
+        """
+        directory = os.path.dirname(file_path)
+        if directory in self._game_names:
+            return self._game_names[directory]
+        task = self._name_tasks.get(directory)
+        if task is None:
+            task = asyncio.ensure_future(self.get_game_name_from_path(file_path))
+            self._name_tasks[directory] = task
+        try:
+            game_name = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._name_tasks.pop(directory, None)
+        if not game_name.isdigit():
+            self._game_names[directory] = game_name
+        return game_name
+
+    async def _ensure_album(self, game_name, count=1):
+        """
+        选择游戏当前的相册并为 count 张截图预留容量，同一相册的并发请求只创建一次
+        当前相册已接近上限时自动切换到 "<游戏名称> (2)" 等新相册
+        """
+        title = self.album_index.title_for(game_name, count)
+        if title not in self.albums:
+            lock = self._album_locks.setdefault(title, asyncio.Lock())
+            async with lock:
+                if title not in self.albums:
+                    if title != game_name:
+                        print(f'相册已接近 {self.album_index.item_limit} 张上限，切换到新相册: {title}')
+                    album_id = await self.create_album(title)
+                    if not album_id:
+                        print(f'创建相册失败: {title}')
+                        return None
+        album_id = self.albums[title]
+        self.album_index.reserve(album_id, count)
+        return album_id
+
+    async def _resolve_album(self, file_path):
+        game_name = await self.resolve_game_name(file_path)
+        return game_name, await self._ensure_album(game_name)
+
+    async def _read_chunks(self, file_path):
+        """在线程中分块读取文件，避免阻塞事件循环和整文件读入内存"""
+        f = await asyncio.to_thread(open, file_path, 'rb')
+        try:
+            while True:
+                chunk = await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            f.close()
+
+    async def _upload_media(self, file_path):
+        """上传媒体文件并获取上传token"""
+        try:
+            mime_type = 'image/jpeg'  # 默认 MIME 类型
+            if file_path.lower().endswith('.png'):
+                mime_type = 'image/png'
+            elif file_path.lower().endswith('.gif'):
+                mime_type = 'image/gif'
+
+            file_size = os.path.getsize(file_path)
+            headers = await self._auth_headers()
+            headers.update({
+                'Content-Type': 'application/octet-stream',
+                'Content-Length': str(file_size),
+                'X-Goog-Upload-Protocol': 'raw',
+                'X-Goog-Upload-Content-Type': mime_type,
+                'X-Goog-Upload-Content-Length': str(file_size),
+            })
+            async with self._semaphore:
+                async with self._session.post(self.api_base + '/v1/uploads', headers=headers,
+                                              data=self._read_chunks(file_path)) as response:
+                    content = await response.text()
+                    if response.status == 200:
+                        print(f'成功获取上传token')
+                        return content
+                    print(f'获取上传token失败: {response.status} - {content}')
+        except Exception as e:
+            print(f'上传媒体文件时出错: {e}')
+        return None
+
+    async def upload_screenshot(self, file_path):
+        """上传截图到Google Photos"""
+        try:
+            # 解析相册与上传文件字节同时进行，只在 batchCreate 前汇合
+            (game_name, album_id), upload_token = await asyncio.gather(
+                self._resolve_album(file_path), self._upload_media(file_path))
+            if not album_id:
+                return False
+            if not upload_token:
+                self.album_index.release(album_id, 1)
+                return False
+
+            result = await self._request_json('POST', '/v1/mediaItems:batchCreate', json={
+                'albumId': album_id,
+                'newMediaItems': [{
+                    'description': f'Screenshot from {game_name}',
+                    'simpleMediaItem': {
+                        'fileName': os.path.basename(file_path),
+                        'uploadToken': upload_token
+                    }
+                }]
+            })
+            if 'newMediaItemResults' in result:
+                item_result = result['newMediaItemResults'][0]
+                if 'mediaItem' in item_result:
+                    print(f'成功上传截图到相册: {game_name}')
+                    print(f'图片链接: {item_result["mediaItem"]["productUrl"]}')
+                    return True
+                print(f'上传失败: {item_result.get("status", {}).get("message", "未知错误")}')
+            else:
+                print('上传失败: 未收到预期的响应')
+            self.album_index.release(album_id, 1)
+        except Exception as e:
+            print(f'上传截图时出错: {e}')
+        return False
+
+    async def create_media_items(self, game_name, uploads):
+        """
+        把已上传的文件批量添加到游戏相册
+
+        Args:
+            game_name (str): 游戏名称（相册标题）
+            uploads (list): [(file_path, upload_token), ...]
+
+        Returns:
+            list: 成功创建媒体项的文件路径
+        """
+        if not uploads:
+            return []
+
+        created = []
+        for start in range(0, len(uploads), BATCH_CREATE_LIMIT):
+            chunk = uploads[start:start + BATCH_CREATE_LIMIT]
+            # 每批单独选择相册，相册满了也能切换到新相册
+            album_id = await self._ensure_album(game_name, len(chunk))
+            if not album_id:
+                continue
+            try:
+                result = await self._request_json('POST', '/v1/mediaItems:batchCreate', json={
+                    'albumId': album_id,
+                    'newMediaItems': [{
+                        'description': f'Screenshot from {game_name}',
+                        'simpleMediaItem': {
+                            'fileName': os.path.basename(file_path),
+                            'uploadToken': upload_token
+                        }
+                    } for file_path, upload_token in chunk]
+                })
+            except Exception as e:
+                print(f'批量添加到相册时出错: {e}')
+                self.album_index.release(album_id, len(chunk))
+                continue
+            succeeded = 0
+            for (file_path, _), item_result in zip(chunk, result.get('newMediaItemResults', [])):
+                if 'mediaItem' in item_result:
+                    created.append(file_path)
+                    succeeded += 1
+                else:
+                    print(f'上传失败: {file_path} - {item_result.get("status", {}).get("message", "未知错误")}')
+            self.album_index.release(album_id, len(chunk) - succeeded)
+        print(f'成功上传 {len(created)}/{len(uploads)} 张截图到相册: {game_name}')
+        return created
@@ -0,0 +1,299 @@
+"""
+批量导入已有的截图库
+
+用法:
+    python bulk_import.py <截图目录> [--credentials credentials.json] [--workers 8]
+
+- 并行遍历目录树，按 get_game_name_from_path 的结果分组上传到对应相册
+- 内容相同的文件（SHA-1 相同）只上传一次
+- 进度写入检查点文件，中断后重新运行同一命令即可从上次的位置继续
+- 配置了多个账号（config.PHOTOS_ACCOUNTS）时按游戏分配到各账号并统计配额
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from uploader import GooglePhotosUploader, BATCH_CREATE_LIMIT
+from pipeline import ByteBudget
+from accounts import MultiAccountUploader
+from config import PHOTOS_ACCOUNTS, ACCOUNT_GAME_MAP, ACCOUNT_DAILY_REQUEST_LIMIT
+
+SUPPORTED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif'}
+
+
+def file_sha1(file_path, chunk_size=1024 * 1024):
+    """分块计算文件的 SHA-1，不把整个文件读入内存"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _scan_dir(directory):
+    """列出单个目录下的截图文件和子目录"""
+    files, subdirs = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
+                    files.append((entry.path, entry.stat().st_size))
+    except OSError as e:
+        print(f'无法读取目录 {directory}: {e}')
+    return directory, sorted(files), subdirs
+
+
+def scan_tree(root, workers=8):
+    """
+    并行遍历目录树
+
+    Returns:
+        dict: 目录 -> [(文件路径, 文件大小), ...]，只包含有截图的目录
+    """
+    result = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_scan_dir, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory, files, subdirs = future.result()
+                if files:
+                    result[directory] = files
+                for subdir in subdirs:
+                    pending.add(executor.submit(_scan_dir, subdir))
+    return result
+
+
+class Checkpoint:
+    """追加写入的导入检查点：记录已完成的文件路径和内容哈希"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done_paths = set()
+        self.done_hashes = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 上次中断时可能留下写了一半的最后一行
+                        continue
+                    self.done_paths.add(record['path'])
+                    if record.get('sha1'):
+                        self.done_hashes.add(record['sha1'])
+
+    def record(self, entries):
+        """entries: [(file_path, sha1), ...]"""
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for file_path, sha1 in entries:
+                    f.write(json.dumps({'path': file_path, 'sha1': sha1}, ensure_ascii=False) + '\n')
+                    self.done_paths.add(file_path)
+                    if sha1:
+                        self.done_hashes.add(sha1)
+
+
+class Progress:
+    """统计导入速度并定期输出 文件/s、MB/s 和预计剩余时间"""
+
+    def __init__(self, total_files, total_bytes, interval=5.0):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.files = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.failed = 0
+        self.start = time.monotonic()
+        self._last_report = self.start
+        self._lock = threading.Lock()
+
+    def advance(self, size, skipped=False, failed=False):
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+            self.skipped += skipped
+            self.failed += failed
+            now = time.monotonic()
+            if now - self._last_report >= self.interval:
+                self._last_report = now
+                print(self.summary())
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.start, 1e-6)
+        files_per_sec = self.files / elapsed
+        mb_per_sec = self.bytes / elapsed / (1024 * 1024)
+        remaining = self.total_bytes - self.bytes
+        eta = remaining / (self.bytes / elapsed) if self.bytes else 0
+        return (f'进度 {self.files}/{self.total_files} 文件 '
+                f'({files_per_sec:.1f} 文件/s, {mb_per_sec:.2f} MB/s, '
+                f'跳过 {self.skipped}, 失败 {self.failed}, '
+                f'预计剩余 {int(eta // 60)} 分 {int(eta % 60)} 秒)')
+
+
+class BulkImporter:
+    def __init__(self, uploader, workers=8, checkpoint_path='bulk_import_checkpoint.jsonl',
+                 max_inflight_bytes=64 * 1024 * 1024):
+        """
+        初始化批量导入器
+
+        Args:
+            uploader: GooglePhotosUploader 或 MultiAccountUploader
+            workers (int): 并行遍历和上传的线程数
+            checkpoint_path (str): 检查点文件路径
+            max_inflight_bytes (int): 同时读入内存上传的文件总字节数上限
+        """
+        self.uploader = uploader
+        self.workers = workers
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.budget = ByteBudget(max_inflight_bytes)
+        self._hashes_in_flight = set()
+        self._hash_lock = threading.Lock()
+
+    def plan(self, root):
+        """
+        遍历目录并按游戏分组，跳过检查点中已完成的文件
+
+        Returns:
+            dict: 游戏名称 -> [(文件路径, 文件大小), ...]
+        """
+        groups = {}
+        for directory, files in sorted(scan_tree(root, self.workers).items()):
+            todo = [(path, size) for path, size in files if path not in self.checkpoint.done_paths]
+            if not todo:
+                continue
+            game_name = self.uploader.resolve_game_name(todo[0][0])
+            groups.setdefault(game_name, []).extend(todo)
+        return groups
+
+    def run(self, root):
+        """执行导入，返回 Progress 统计"""
+        groups = self.plan(root)
+        total_files = sum(len(files) for files in groups.values())
+        total_bytes = sum(size for files in groups.values() for _, size in files)
+        print(f'待导入 {total_files} 个文件，共 {total_bytes / (1024 * 1024):.1f} MB，'
+              f'{len(groups)} 个游戏')
+        progress = Progress(total_files, total_bytes)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for game_name, files in groups.items():
+                self._import_game(executor, game_name, files, progress)
+        print(progress.summary())
+        return progress
+
+    def _import_game(self, executor, game_name, files, progress):
+        """并行上传一个游戏的文件，每凑满一批调用一次 batchCreate"""
+        batch = []
+        pending = set()
+        # 限制同时存在的任务数，避免为十万个文件一次性创建 Future
+        max_pending = self.workers * 4
+        for path, size in files:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._collect(done, batch, progress)
+                if len(batch) >= BATCH_CREATE_LIMIT:
+                    self._flush(game_name, batch, progress)
+            pending.add(executor.submit(self._upload_one, path, size))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            self._collect(done, batch, progress)
+            if len(batch) >= BATCH_CREATE_LIMIT:
+                self._flush(game_name, batch, progress)
+        self._flush(game_name, batch, progress)
+
+    def _collect(self, done, batch, progress):
+        for future in done:
+            path, size, sha1, token = future.result()
+            if token:
+                batch.append((path, size, sha1, token))
+            elif sha1 is None:
+                progress.advance(size, failed=True)
+            else:
+                progress.advance(size, skipped=True)
+
+    def _flush(self, game_name, batch, progress):
+        """把已上传的文件按路径顺序添加到相册并写入检查点"""
+        while batch:
+            chunk = sorted(batch[:BATCH_CREATE_LIMIT])
+            del batch[:BATCH_CREATE_LIMIT]
+            created = set(self.uploader.create_media_items(
+                game_name, [(path, token) for path, _, _, token in chunk]))
+            self.checkpoint.record([(path, sha1) for path, _, sha1, _ in chunk if path in created])
+            for path, size, sha1, _ in chunk:
+                with self._hash_lock:
+                    self._hashes_in_flight.discard(sha1)
+                progress.advance(size, failed=path not in created)
+
+    def _upload_one(self, path, size):
+        """
+        计算哈希并上传单个文件
+
+        Returns:
+            tuple: (path, size, sha1, upload_token)；
+                   重复文件 token 为 None，读取失败时 sha1 和 token 都为 None
+        """
+        try:
+            sha1 = file_sha1(path)
+        except OSError as e:
+            print(f'读取文件失败: {path} ({e})')
+            return path, size, None, None
+        with self._hash_lock:
+            uploaded = sha1 in self.checkpoint.done_hashes
+            in_flight = sha1 in self._hashes_in_flight
+            if not uploaded and not in_flight:
+                self._hashes_in_flight.add(sha1)
+        if uploaded:
+            # 相同内容已经上传过，记录到检查点，下次不再计算哈希
+            self.checkpoint.record([(path, None)])
+            return path, size, sha1, None
+        if in_flight:
+            # 相同内容正在上传，本次跳过；不写检查点，以免那次上传失败后漏传
+            return path, size, sha1, None
+        charge = self.budget.acquire(size)
+        try:
+            token = self.uploader._upload_media(path)
+        finally:
+            self.budget.release(charge)
+        if not token:
+            with self._hash_lock:
+                self._hashes_in_flight.discard(sha1)
+            return path, size, None, None
+        return path, size, sha1, token
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量导入已有的游戏截图到 Google Photos')
+    parser.add_argument('root', help='截图库根目录')
+    parser.add_argument('--credentials', default='credentials.json',
+                        help='Google API credentials.json 文件的路径')
+    parser.add_argument('--workers', type=int, default=8, help='并行线程数')
+    parser.add_argument('--checkpoint', default='bulk_import_checkpoint.jsonl',
+                        help='检查点文件路径，用于中断后继续导入')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        print(f'目录不存在: {args.root}')
+        return 1
+    if PHOTOS_ACCOUNTS:
+        uploader = MultiAccountUploader.from_config(PHOTOS_ACCOUNTS, ACCOUNT_GAME_MAP,
+                                                    daily_limit=ACCOUNT_DAILY_REQUEST_LIMIT)
+    else:
+        uploader = GooglePhotosUploader(args.credentials)
+    importer = BulkImporter(uploader, workers=args.workers, checkpoint_path=args.checkpoint)
+    try:
+        progress = importer.run(args.root)
+    except KeyboardInterrupt:
+        print('导入已中断，重新运行相同命令即可继续')
+        return 1
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
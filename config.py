@@ -16,4 +16,64 @@ OTHER_SCREENSHOT_PATHS = [
 ]
 
 # 合并所有监控路径
-MONITORING_PATHS = STEAM_SCREENSHOT_PATHS + OTHER_SCREENSHOT_PATHS 
\ No newline at end of file
+MONITORING_PATHS = STEAM_SCREENSHOT_PATHS + OTHER_SCREENSHOT_PATHS 
+
+# 可热加载的配置文件（JSON 或 TOML，见 live_config.py），存在时其中的监控路径和上传参数
+# 覆盖本文件中的值，运行中修改后自动生效，不需要重启
+MONITOR_CONFIG_PATH = 'monitor_config.json'
+# 每隔多少秒检查一次配置文件是否有变化
+CONFIG_RELOAD_INTERVAL = 5
+
+# 上传流水线配置
+# 上传线程数
+UPLOAD_WORKERS = 2
+# 内存队列最多容纳的待上传文件数
+UPLOAD_QUEUE_SIZE = 100
+# 同时读入内存上传的文件总字节数上限
+MAX_INFLIGHT_BYTES = 64 * 1024 * 1024
+# 队列满时把待上传路径溢出到该文件，设为 None 则阻塞事件处理
+UPLOAD_SPILL_PATH = 'upload_spill.txt'
+# 各调度通道的权重：新截图(live) / 重试(retry) / 批量补传(backfill)
+UPLOAD_LANE_WEIGHTS = {'live': 8, 'retry': 3, 'backfill': 1}
+# 任意通道队首等待超过该秒数时优先调度，防止饿死
+UPLOAD_MAX_WAIT = 30
+# 断网时暂存待上传文件的发件箱，网络恢复后分批上传；设为 None 则断网时按普通失败重试
+UPLOAD_OUTBOX_PATH = 'upload_outbox.jsonl'
+# 离线时每隔多少秒探测一次网络
+OUTBOX_PROBE_INTERVAL = 30
+# 网络恢复后每次从发件箱读出的文件数
+OUTBOX_FLUSH_BATCH = 200
+# 上传失败后的最多重试次数
+UPLOAD_MAX_RETRIES = 3
+# 每隔多少秒输出一次各通道的排队等待统计
+UPLOAD_REPORT_INTERVAL = 300
+
+# 连拍近似截图过滤（需要安装 Pillow 和 numpy）
+NEAR_DUPLICATE_FILTER = False
+# 感知哈希算法：'dhash' 或 'phash'
+NEAR_DUPLICATE_METHOD = 'dhash'
+# 汉明距离不超过该值（64 位哈希）视为近似重复
+NEAR_DUPLICATE_MAX_DISTANCE = 4
+# 每个相册保留最近多少张截图的哈希用于比较
+NEAR_DUPLICATE_WINDOW = 50
+# 只和最近多少秒内上传的截图比较
+NEAR_DUPLICATE_MAX_AGE = 600
+
+# 多账号分流上传：为空时只使用 credentials.json 和 token.pickle 对应的一个账号
+# 例如：
+# PHOTOS_ACCOUNTS = [
+#     {'name': 'main', 'credentials': 'credentials.json', 'token': 'token.main.pickle'},
+#     {'name': 'rig2', 'credentials': 'credentials.json', 'token': 'token.rig2.pickle'},
+# ]
+PHOTOS_ACCOUNTS = []
+# 游戏名称 -> 账号名称，未列出的游戏按游戏名称的哈希分配到账号
+ACCOUNT_GAME_MAP = {}
+# 每个账号每天的 API 请求数上限，用完后该账号的游戏改用下一个账号
+ACCOUNT_DAILY_REQUEST_LIMIT = 10000
+
+# 按需性能采集（见 profiling.py），结果写入该目录
+PROFILE_OUTPUT_DIR = 'profiles'
+# 每次采集的默认时长（秒）
+PROFILE_DURATION = 30
+# 本地控制接口端口，设为 None 则只能用信号触发
+PROFILE_CONTROL_PORT = None
@@ -0,0 +1,103 @@
+"""
+可热加载的监控配置
+
+config.py 只在启动时读取一次。这里再读取一个数据配置文件（JSON，或在 Python 3.11+ 上的 TOML），
+监控程序运行时定期检查它的修改时间，有变化就重新读取，由 monitor.py 把新的监控路径和
+上传参数应用到正在运行的 Observer 和上传流水线上，不需要重启，也不会丢掉正在上传的文件。
+
+示例 monitor_config.json:
+    {
+        "monitoring_paths": ["E:/Steam/userdata/3350395/760/remote/2246340/screenshots"],
+        "upload_workers": 4,
+        "max_inflight_bytes": 134217728
+    }
+文件中没有出现的配置项沿用 config.py 中的值（或上一次应用的值）。
+"""
+import json
+import os
+from scheduler import LANES
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+# 配置文件中可以设置的项 -> 允许的类型
+SETTINGS = {
+    'monitoring_paths': list,
+    'upload_workers': int,
+    'max_inflight_bytes': int,
+    'upload_lane_weights': dict,
+    'upload_max_wait': (int, float),
+    'upload_max_retries': int,
+}
+
+# 必须至少为 1 的配置项，为 0 时上传会静默停止
+POSITIVE_SETTINGS = ('upload_workers', 'max_inflight_bytes', 'upload_max_retries')
+
+
+def load_config_file(path):
+    """
+    读取并校验配置文件
+
+    Returns:
+        dict: 配置项 -> 值，只包含 SETTINGS 中列出的项
+
+    Raises:
+        ValueError: 文件内容无法解析或类型不正确
+    """
+    if path.lower().endswith('.toml'):
+        if tomllib is None:
+            raise ValueError('读取 TOML 配置文件需要 Python 3.11 或更高版本')
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError('配置文件的顶层必须是对象')
+
+    settings = {}
+    for key, value in data.items():
+        expected = SETTINGS.get(key)
+        if expected is None:
+            print(f'忽略未知的配置项: {key}')
+            continue
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError(f'配置项 {key} 的类型不正确: {value!r}')
+        if key in POSITIVE_SETTINGS and value < 1:
+            raise ValueError(f'配置项 {key} 必须大于等于 1: {value!r}')
+        if key == 'upload_lane_weights':
+            for lane, weight in value.items():
+                if lane not in LANES:
+                    raise ValueError(f'未知的上传通道: {lane}')
+                if isinstance(weight, bool) or not isinstance(weight, int) or weight < 1:
+                    raise ValueError(f'通道 {lane} 的权重必须是正整数: {weight!r}')
+        settings[key] = value
+    return settings
+
+
+class ConfigWatcher:
+    """按修改时间检查配置文件是否有变化"""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+
+    def poll(self):
+        """
+        配置文件有变化时返回新的配置
+        没有变化、文件不存在或内容无效时返回 None，内容无效时保持当前配置
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        try:
+            return load_config_file(self.path)
+        except (OSError, ValueError) as e:
+            print(f'读取配置文件 {self.path} 时出错，保持当前配置: {e}')
+            return None
@@ -3,12 +3,28 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import os
 from uploader import GooglePhotosUploader
-from config import MONITORING_PATHS
+from pipeline import UploadPipeline
+from near_duplicate import NearDuplicateFilter
+from outbox import Outbox
+from accounts import MultiAccountUploader
+from live_config import ConfigWatcher
+from profiling import ProfilingHooks
+from config import (MONITORING_PATHS, UPLOAD_WORKERS, UPLOAD_QUEUE_SIZE,
+                    MAX_INFLIGHT_BYTES, UPLOAD_SPILL_PATH, UPLOAD_LANE_WEIGHTS,
+                    UPLOAD_MAX_WAIT, UPLOAD_MAX_RETRIES, UPLOAD_REPORT_INTERVAL,
+                    NEAR_DUPLICATE_FILTER, NEAR_DUPLICATE_METHOD, NEAR_DUPLICATE_MAX_DISTANCE,
+                    NEAR_DUPLICATE_WINDOW, NEAR_DUPLICATE_MAX_AGE,
+                    UPLOAD_OUTBOX_PATH, OUTBOX_PROBE_INTERVAL, OUTBOX_FLUSH_BATCH,
+                    PHOTOS_ACCOUNTS, ACCOUNT_GAME_MAP, ACCOUNT_DAILY_REQUEST_LIMIT,
+                    MONITOR_CONFIG_PATH, CONFIG_RELOAD_INTERVAL,
+                    PROFILE_OUTPUT_DIR, PROFILE_DURATION, PROFILE_CONTROL_PORT)
 import glob
 
 class ScreenshotHandler(FileSystemEventHandler):
-    def __init__(self, uploader, monitored_paths):
+    def __init__(self, uploader, monitored_paths, pipeline=None):
         self.uploader = uploader
+        # 设置了上传流水线时只把文件放入队列，不在事件线程中上传
+        self.pipeline = pipeline
         self.supported_extensions = {'.jpg', '.jpeg', '.png', '.gif'}
         # 存储监控路径的绝对路径
         self.monitored_paths = set(os.path.abspath(path) for path in monitored_paths)
@@ -29,7 +45,10 @@ class ScreenshotHandler(FileSystemEventHandler):
             print(f'检测到新的截图: {event.src_path}')
             # 等待文件写入完成
             time.sleep(1)
-            self.uploader.upload_screenshot(event.src_path)
+            if self.pipeline:
+                self.pipeline.submit(event.src_path)
+            else:
+                self.uploader.upload_screenshot(event.src_path)
 
 def expand_path_patterns(path_patterns):
     """
@@ -51,14 +70,47 @@ def expand_path_patterns(path_patterns):
                 expanded_paths.add(pattern)
     return list(expanded_paths)
 
-def start_monitoring(path_patterns, credentials_path='credentials.json'):
+def update_watches(observer, handler, watches, path_patterns):
+    """
+    按新的路径模式在运行中的 Observer 上增删监控
+
+    Args:
+        watches (dict): 目录 -> observer.schedule 返回的 ObservedWatch，原地更新
+    """
+    paths = set(expand_path_patterns(path_patterns))
+    for path in sorted(set(watches) - paths):
+        observer.unschedule(watches.pop(path))
+        print(f'停止监控路径: {path}')
+    for path in sorted(paths - set(watches)):
+        # 设置为不递归监控
+        watches[path] = observer.schedule(handler, path, recursive=False)
+        print(f'开始监控路径: {path}')
+    handler.monitored_paths = set(os.path.abspath(path) for path in watches)
+
+def apply_settings(settings, observer, handler, watches, pipeline):
+    """把重新读取的配置应用到正在运行的 Observer 和上传流水线"""
+    if 'monitoring_paths' in settings:
+        update_watches(observer, handler, watches, settings['monitoring_paths'])
+    pipeline.reconfigure(workers=settings.get('upload_workers'),
+                         max_inflight_bytes=settings.get('max_inflight_bytes'),
+                         weights=settings.get('upload_lane_weights'),
+                         max_wait=settings.get('upload_max_wait'),
+                         max_retries=settings.get('upload_max_retries'))
+    print(f'已应用新的监控配置: {", ".join(sorted(settings))}')
+
+def start_monitoring(path_patterns, credentials_path='credentials.json', config_path=None):
     """
     开始监控指定的路径模式列表
     
     Args:
         path_patterns: 需要监控的路径模式列表（支持通配符）
         credentials_path: Google API credentials.json 文件的路径
+        config_path: 可热加载的配置文件路径（见 live_config.py），其中的值覆盖 config.py
     """
+    watcher = ConfigWatcher(config_path) if config_path else None
+    settings = (watcher.poll() if watcher else None) or {}
+    path_patterns = settings.get('monitoring_paths', path_patterns)
+
     # 展开路径模式为实际目录
     monitor_paths = expand_path_patterns(path_patterns)
     
@@ -66,25 +118,67 @@ def start_monitoring(path_patterns, credentials_path='credentials.json'):
         print('警告：没有找到任何匹配的目录路径')
         return
         
-    uploader = GooglePhotosUploader(credentials_path)
-    event_handler = ScreenshotHandler(uploader, monitor_paths)
+    if PHOTOS_ACCOUNTS:
+        uploader = MultiAccountUploader.from_config(PHOTOS_ACCOUNTS, ACCOUNT_GAME_MAP,
+                                                    daily_limit=ACCOUNT_DAILY_REQUEST_LIMIT)
+    else:
+        uploader = GooglePhotosUploader(credentials_path)
+    near_duplicate_filter = None
+    if NEAR_DUPLICATE_FILTER:
+        near_duplicate_filter = NearDuplicateFilter(max_distance=NEAR_DUPLICATE_MAX_DISTANCE,
+                                                    window=NEAR_DUPLICATE_WINDOW,
+                                                    max_age=NEAR_DUPLICATE_MAX_AGE,
+                                                    method=NEAR_DUPLICATE_METHOD)
+    outbox = None
+    if UPLOAD_OUTBOX_PATH:
+        outbox = Outbox(uploader, UPLOAD_OUTBOX_PATH,
+                        probe_interval=OUTBOX_PROBE_INTERVAL,
+                        flush_batch=OUTBOX_FLUSH_BATCH)
+        outbox.start()
+    pipeline = UploadPipeline(uploader,
+                              workers=settings.get('upload_workers', UPLOAD_WORKERS),
+                              max_queue=UPLOAD_QUEUE_SIZE,
+                              max_inflight_bytes=settings.get('max_inflight_bytes', MAX_INFLIGHT_BYTES),
+                              spill_path=UPLOAD_SPILL_PATH,
+                              weights=settings.get('upload_lane_weights', UPLOAD_LANE_WEIGHTS),
+                              max_wait=settings.get('upload_max_wait', UPLOAD_MAX_WAIT),
+                              max_retries=settings.get('upload_max_retries', UPLOAD_MAX_RETRIES),
+                              near_duplicate_filter=near_duplicate_filter,
+                              outbox=outbox)
+    pipeline.start()
+    event_handler = ScreenshotHandler(uploader, monitor_paths, pipeline)
     observer = Observer()
-    
-    for path in monitor_paths:
-        # 设置为不递归监控
-        observer.schedule(event_handler, path, recursive=False)
-        print(f'开始监控路径: {path}')
+    watches = {}
+    update_watches(observer, event_handler, watches, path_patterns)
+    profiling = ProfilingHooks(PROFILE_OUTPUT_DIR, PROFILE_DURATION)
+    profiling.install_signal()
+    if PROFILE_CONTROL_PORT:
+        profiling.serve(PROFILE_CONTROL_PORT)
     
     observer.start()
     try:
+        elapsed = 0
         while True:
             time.sleep(1)
+            elapsed += 1
+            if elapsed % UPLOAD_REPORT_INTERVAL == 0:
+                print(f'上传队列统计: {pipeline.report()}')
+            if watcher and elapsed % CONFIG_RELOAD_INTERVAL == 0:
+                settings = watcher.poll()
+                if settings:
+                    apply_settings(settings, observer, event_handler, watches, pipeline)
     except KeyboardInterrupt:
         observer.stop()
         print('停止监控')
     observer.join()
+    profiling.close()
+    # 未上传完的文件保留在溢出文件中，下次启动时继续
+    pipeline.stop(wait=False)
+    # 发件箱中的记录保存在磁盘上，下次启动时继续发送
+    if outbox:
+        outbox.stop()
 
 if __name__ == "__main__":
-    # 使用config.py中定义的监控路径
+    # 使用config.py中定义的监控路径，monitor_config.json 存在时以其中的值为准
     credentials_path = "credentials.json"
-    start_monitoring(MONITORING_PATHS, credentials_path) 
\ No newline at end of file
+    start_monitoring(MONITORING_PATHS, credentials_path, config_path=MONITOR_CONFIG_PATH)
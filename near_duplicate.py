@@ -0,0 +1,167 @@
+"""
+连拍近似截图过滤
+
+按住截图键会产生几十张几乎一样的画面。这里对缩略图计算感知哈希
+（dHash 或 pHash），和同一相册最近上传过的哈希比较汉明距离，
+距离不超过阈值的截图视为近似重复，不再上传，只记录到它所属的组中。
+依赖 Pillow 和 NumPy，缺少时过滤器不可用。
+"""
+import threading
+import time
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = None
+    Image = None
+
+DHASH = 'dhash'
+PHASH = 'phash'
+
+
+def _grayscale_thumbnail(file_path, width, height):
+    """读取图片并缩小为灰度缩略图，返回 float 数组"""
+    with Image.open(file_path) as image:
+        # JPEG 可以在解码时直接按比例缩小，避免完整解码大图
+        image.draft('L', (width * 4, height * 4))
+        thumbnail = image.convert('L').resize((width, height), Image.LANCZOS)
+    return np.asarray(thumbnail, dtype=np.float64)
+
+
+def _pack_bits(bits):
+    """把布尔数组按行优先顺序打包为一个整数"""
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), 'big')
+
+
+def dhash(file_path, hash_size=8):
+    """差值哈希：比较缩略图中每个像素与右侧像素的亮度"""
+    pixels = _grayscale_thumbnail(file_path, hash_size + 1, hash_size)
+    return _pack_bits(pixels[:, 1:] > pixels[:, :-1])
+
+
+_dct_matrices = {}
+
+
+def _dct_matrix(n):
+    """n 阶 DCT-II 变换矩阵"""
+    if n not in _dct_matrices:
+        k = np.arange(n).reshape(-1, 1)
+        i = np.arange(n).reshape(1, -1)
+        matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+        matrix[0, :] = np.sqrt(1.0 / n)
+        _dct_matrices[n] = matrix
+    return _dct_matrices[n]
+
+
+def phash(file_path, hash_size=8, highfreq_factor=4):
+    """感知哈希：对缩略图做二维 DCT，取低频部分与中位数比较"""
+    size = hash_size * highfreq_factor
+    pixels = _grayscale_thumbnail(file_path, size, size)
+    matrix = _dct_matrix(size)
+    low = (matrix @ pixels @ matrix.T)[:hash_size, :hash_size]
+    return _pack_bits(low > np.median(low))
+
+
+def hamming_distances(hashes, value):
+    """向量化计算一组 64 位哈希与 value 的汉明距离"""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class _AlbumIndex:
+    """单个相册最近上传截图的哈希环形缓冲区"""
+
+    def __init__(self, window):
+        self.hashes = np.zeros(window, dtype=np.uint64)
+        self.times = np.full(window, -np.inf)
+        self.paths = [None] * window
+        self.next = 0
+
+    def add(self, value, file_path, now):
+        slot = self.next % len(self.hashes)
+        self.hashes[slot] = np.uint64(value)
+        self.times[slot] = now
+        self.paths[slot] = file_path
+        self.next += 1
+
+    def remove(self, file_path):
+        """删除 file_path 的哈希，让它不再参与比较"""
+        for slot, path in enumerate(self.paths):
+            if path == file_path:
+                self.times[slot] = -np.inf
+                self.paths[slot] = None
+
+    def nearest(self, value, now, max_age):
+        """返回 max_age 秒内最相近的 (距离, 路径)，没有时返回 None"""
+        recent = np.flatnonzero(self.times >= now - max_age)
+        if not len(recent):
+            return None
+        distances = hamming_distances(self.hashes[recent], value)
+        best = int(np.argmin(distances))
+        return int(distances[best]), self.paths[recent[best]]
+
+
+class NearDuplicateFilter:
+    def __init__(self, max_distance=4, window=50, max_age=600, method=DHASH):
+        """
+        初始化近似截图过滤器
+
+        Args:
+            max_distance (int): 汉明距离不超过该值视为近似重复
+            window (int): 每个相册保留最近多少张截图的哈希
+            max_age (float): 只和最近多少秒内上传的截图比较
+            method (str): 'dhash' 或 'phash'
+        """
+        if np is None:
+            raise ImportError('近似截图过滤需要安装 Pillow 和 numpy')
+        if method not in (DHASH, PHASH):
+            raise ValueError(f'未知的哈希算法: {method}')
+        self.max_distance = max_distance
+        self.window = window
+        self.max_age = max_age
+        self.hash_func = dhash if method == DHASH else phash
+        # 被跳过的截图按代表截图分组: 代表截图路径 -> [被跳过的路径, ...]
+        self.groups = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def check(self, album, file_path):
+        """
+        计算截图哈希并与相册最近的截图比较，不重复时在同一把锁内记录其哈希，
+        同时处理的连拍帧也会和它比较；上传失败时调用 forget 撤销
+
+        Returns:
+            tuple: (是否近似重复, 哈希值)；无法读取图片时哈希为 None，按不重复处理
+        """
+        try:
+            value = self.hash_func(file_path)
+        except Exception as e:
+            print(f'计算图片哈希时出错: {file_path} ({e})')
+            return False, None
+        with self._lock:
+            now = time.monotonic()
+            index = self._indexes.get(album)
+            if index is None:
+                index = self._indexes[album] = _AlbumIndex(self.window)
+            nearest = index.nearest(value, now, self.max_age)
+            if nearest and nearest[0] <= self.max_distance:
+                distance, representative = nearest
+                self.groups.setdefault(representative, []).append(file_path)
+                print(f'跳过近似截图 (距离 {distance}): {file_path} ~ {representative}')
+                return True, value
+            index.add(value, file_path, now)
+        return False, value
+
+    def forget(self, album, file_path):
+        """
+        截图上传失败后撤销 check 记录的哈希
+
+        Returns:
+            list: 因为与它近似而被跳过的截图路径，需要重新上传
+        """
+        with self._lock:
+            index = self._indexes.get(album)
+            if index is not None:
+                index.remove(file_path)
+            return self.groups.pop(file_path, [])
@@ -0,0 +1,190 @@
+"""
+离线发件箱
+
+断网时（局域网对战、笔记本外出）每次上传都会失败，重试几次后文件就被放弃。
+发件箱检测到网络不可用后，把待上传的文件记录到本地的 JSONL 文件中
+（只记录路径、游戏名称、大小、修改时间和 SHA-1，不复制图片），
+后台线程定期探测网络，恢复后按记录顺序分批上传：
+同一游戏的文件按原顺序每 50 个调用一次 batchCreate，相册中的顺序与截图顺序一致。
+"""
+import json
+import os
+import socket
+import threading
+from pipeline import SpillFile
+from bulk_import import file_sha1
+from uploader import BATCH_CREATE_LIMIT
+
+PROBE_HOST = 'photoslibrary.googleapis.com'
+PROBE_PORT = 443
+
+
+def is_online(host=PROBE_HOST, port=PROBE_PORT, timeout=3.0):
+    """能与 Photos Library API 建立 TCP 连接时认为网络可用"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+class Outbox:
+    def __init__(self, uploader, path, probe_interval=30.0, flush_batch=200, probe=is_online):
+        """
+        初始化离线发件箱
+
+        Args:
+            uploader (GooglePhotosUploader): 上传器
+            path (str): 发件箱文件路径，上次未发出的记录在启动时恢复
+            probe_interval (float): 离线时每隔多少秒探测一次网络
+            flush_batch (int): 恢复网络后每次从发件箱读出的记录数
+            probe (callable): 网络探测函数，返回 bool
+        """
+        self.uploader = uploader
+        self.probe_interval = probe_interval
+        self.flush_batch = flush_batch
+        self.probe = probe
+        self.offline = False
+        self._spool = SpillFile(path)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        if self._spool.count:
+            print(f'从发件箱恢复 {self._spool.count} 个待上传文件')
+
+    def start(self):
+        """启动后台探测/发送线程"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='outbox-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def pending(self):
+        with self._lock:
+            return self._spool.count
+
+    def active(self):
+        """离线或发件箱中还有未发出的文件时返回 True，此时新文件也应放入发件箱以保持顺序"""
+        with self._lock:
+            return self.offline or bool(self._spool.count)
+
+    def check_offline(self):
+        """上传失败后调用：探测网络，不可用时进入离线模式并返回 True"""
+        if self.probe():
+            return False
+        with self._lock:
+            if not self.offline:
+                print('网络不可用，新截图将暂存到发件箱')
+            self.offline = True
+        return True
+
+    def put(self, file_path):
+        """
+        记录一个待上传文件
+
+        Returns:
+            bool: 记录成功返回 True，文件无法读取时返回 False
+        """
+        try:
+            stat = os.stat(file_path)
+            sha1 = file_sha1(file_path)
+        except OSError as e:
+            print(f'无法读取文件，跳过: {file_path} ({e})')
+            return False
+        # 离线时 Steam API 不可用，解析到的数字游戏ID不记录，发送时再解析
+        game_name = self.uploader.resolve_game_name(file_path)
+        record = {'path': file_path, 'game': None if game_name.isdigit() else game_name,
+                  'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': sha1}
+        with self._lock:
+            self._spool.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        self._wakeup.set()
+        return True
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.probe_interval)
+            self._wakeup.clear()
+            if self._stop_event.is_set():
+                break
+            if not self.pending():
+                continue
+            if not self.probe():
+                continue
+            with self._lock:
+                if self.offline:
+                    print(f'网络已恢复，开始上传发件箱中的 {self._spool.count} 个文件')
+                self.offline = False
+            try:
+                self.flush()
+            except Exception as e:
+                print(f'发送发件箱时出错: {e}')
+
+    def flush(self):
+        """
+        按记录顺序分批上传发件箱中的文件，直到发件箱为空、网络再次断开或调用了 stop()
+
+        Returns:
+            int: 处理完毕（上传成功或已从发件箱移除）的记录数
+        """
+        uploaded = 0
+        while not self._stop_event.is_set():
+            with self._lock:
+                lines, offset = self._spool.peek(self.flush_batch)
+            if not lines:
+                break
+            records = [json.loads(line) for line in lines]
+            # 发送期间这些记录仍留在磁盘上并计入 pending：进程中途退出不会丢失，
+            # active() 也保持为 True，新截图继续排在它们后面
+            failed = self._send(records)
+            uploaded += len(records) - len(failed)
+            offline = bool(failed) and self.check_offline()
+            with self._lock:
+                self._spool.advance(offset, len(lines))
+                if offline:
+                    # 没发出去的记录放回发件箱最前面，保持原来的顺序
+                    self._spool.rewrite([json.dumps(record, ensure_ascii=False,
+                                                    separators=(',', ':')) for record in failed])
+            if offline:
+                break
+            for record in failed:
+                print(f'网络正常但上传失败，从发件箱移除: {record["path"]}')
+        return uploaded
+
+    def _send(self, records):
+        """
+        上传一批记录，同一游戏的文件按顺序添加到相册
+
+        Returns:
+            list: 上传失败的记录，保持原来的顺序
+        """
+        groups = {}
+        seen = set()
+        for record in records:
+            if not os.path.exists(record['path']):
+                print(f'文件已不存在，从发件箱移除: {record["path"]}')
+                continue
+            if record['sha1'] in seen:
+                continue
+            seen.add(record['sha1'])
+            game_name = record['game'] or self.uploader.resolve_game_name(record['path'])
+            groups.setdefault(game_name, []).append(record)
+
+        failed = set()
+        for game_name, group in groups.items():
+            for start in range(0, len(group), BATCH_CREATE_LIMIT):
+                chunk = group[start:start + BATCH_CREATE_LIMIT]
+                uploads = []
+                for record in chunk:
+                    upload_token = self.uploader._upload_media(record['path'])
+                    if upload_token:
+                        uploads.append((record['path'], upload_token))
+                created = set(self.uploader.create_media_items(game_name, uploads))
+                failed.update(id(record) for record in chunk if record['path'] not in created)
+        return [record for record in records if id(record) in failed]
@@ -0,0 +1,362 @@
+"""
+上传流水线：优先级队列 + 在途字节预算
+
+事件处理器只负责把文件路径放入队列，由固定数量的工作线程执行上传。
+- 每条通道（见 scheduler.py）的队列都有上限，满了以后生产者阻塞，
+  或在配置了溢出文件时把路径写到该通道自己的溢出文件
+- 所有正在读入内存/上传中的文件大小之和不超过 max_inflight_bytes
+这样无论积压多少文件，进程内存峰值都保持恒定。
+"""
+import os
+import queue
+import threading
+from scheduler import PriorityScheduler, LANES, LIVE, RETRY
+
+
+class ByteBudget:
+    """在途字节预算，超出上限时 acquire 阻塞"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def _charge(self, size):
+        # 单个文件超过上限时独占整个预算，否则它永远无法上传
+        return min(size, self.max_bytes)
+
+    def acquire(self, size, timeout=None):
+        """
+        占用 size 字节的预算
+
+        Returns:
+            int: 实际占用的字节数，release 时原样传回；超时返回 None
+        """
+        with self._cond:
+            # 每次检查都按当前上限重新计算，等待期间预算被调小也不会永远等下去
+            if not self._cond.wait_for(
+                    lambda: self.in_flight + self._charge(size) <= self.max_bytes, timeout):
+                return None
+            charge = self._charge(size)
+            self.in_flight += charge
+            return charge
+
+    def resize(self, max_bytes):
+        """运行中调整预算上限，调大时立即唤醒等待的线程，调小时等在途文件完成后生效"""
+        with self._cond:
+            self.max_bytes = max_bytes
+            self._cond.notify_all()
+
+    def release(self, charge):
+        """归还 acquire 返回的 charge 字节预算"""
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - charge)
+            self._cond.notify_all()
+
+
+class SpillFile:
+    """按顺序追加、按顺序读回的路径溢出文件，调用方负责加锁"""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.count = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.count = sum(1 for line in f if line.strip())
+
+    def append(self, file_path):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(file_path + '\n')
+        self.count += 1
+
+    def peek(self, limit):
+        """
+        从上次读到的位置起读出最多 limit 个路径，不移动读取位置
+
+        Returns:
+            tuple: (路径列表, 读完这些路径后的位置)，处理完后传给 advance
+        """
+        paths = []
+        offset = self.offset
+        if not self.count:
+            return paths, offset
+        remaining = self.count
+        with open(self.path, 'r', encoding='utf-8') as f:
+            f.seek(offset)
+            while remaining and len(paths) < limit:
+                line = f.readline()
+                if not line:
+                    break
+                offset = f.tell()
+                file_path = line.rstrip('\n')
+                if file_path:
+                    paths.append(file_path)
+                    remaining -= 1
+        return paths, offset
+
+    def advance(self, offset, count):
+        """把读取位置移到 peek 返回的 offset，count 个路径已处理完"""
+        self.offset = offset
+        self.count -= count
+        if not self.count:
+            # 溢出文件已全部读回，截断以免无限增长
+            open(self.path, 'w').close()
+            self.offset = 0
+
+    def read(self, limit):
+        """从上次读到的位置起读出最多 limit 个路径"""
+        paths, offset = self.peek(limit)
+        self.advance(offset, len(paths))
+        return paths
+
+    def rewrite(self, head):
+        """把 head 放到尚未读回的路径之前，重新写入溢出文件"""
+        if not head and not self.count:
+            return
+        # 逐行复制到临时文件再替换，避免把整个溢出文件读入内存
+        tmp_path = self.path + '.tmp'
+        count = len(head)
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            for file_path in head:
+                out.write(file_path + '\n')
+            if self.count:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    f.seek(self.offset)
+                    for line in f:
+                        if line.strip():
+                            out.write(line)
+                            count += 1
+        os.replace(tmp_path, self.path)
+        self.offset = 0
+        self.count = count
+
+
+def lane_spill_path(spill_path, lane):
+    """每条通道使用独立的溢出文件，例如 upload_spill.txt -> upload_spill.live.txt"""
+    root, ext = os.path.splitext(spill_path)
+    return f'{root}.{lane}{ext}'
+
+
+class UploadPipeline:
+    def __init__(self, uploader, workers=2, max_queue=100,
+                 max_inflight_bytes=64 * 1024 * 1024, spill_path=None,
+                 weights=None, max_wait=30.0, max_retries=3, near_duplicate_filter=None,
+                 outbox=None):
+        """
+        初始化上传流水线
+
+        Args:
+            uploader: 提供 upload_screenshot(file_path) 的上传器
+            workers (int): 上传线程数
+            max_queue (int): 每条通道内存队列最多容纳的路径数
+            max_inflight_bytes (int): 同时读入内存的文件字节数上限
+            spill_path (str): 队列满时溢出路径的文件，为 None 时生产者阻塞
+            weights (dict): 各通道的调度权重
+            max_wait (float): 任意通道队首等待超过该秒数时优先调度
+            max_retries (int): 上传失败后最多重试次数
+            near_duplicate_filter (NearDuplicateFilter): 连拍近似截图过滤器，为 None 时不过滤
+            outbox (Outbox): 离线发件箱，断网时把文件暂存到发件箱而不是重试，为 None 时不使用
+        """
+        self.uploader = uploader
+        self.workers = workers
+        self.scheduler = PriorityScheduler(weights=weights, maxsize=max_queue, max_wait=max_wait)
+        self.budget = ByteBudget(max_inflight_bytes)
+        self.max_retries = max_retries
+        self.near_duplicate_filter = near_duplicate_filter
+        self.outbox = outbox
+        self._attempts = {}
+        self._spill_lock = threading.Lock()
+        self._spills = {}
+        if spill_path:
+            for lane in LANES:
+                spill = SpillFile(lane_spill_path(spill_path, lane))
+                if spill.count:
+                    print(f'从溢出文件恢复 {spill.count} 个待上传文件 ({lane})')
+                self._spills[lane] = spill
+        self._stop_event = threading.Event()
+        # [(线程, 退出事件), ...]，减少线程数时设置退出事件，线程处理完当前文件后退出
+        self._threads = []
+        self._retired = []
+        self._threads_lock = threading.Lock()
+
+    def start(self):
+        """启动上传线程"""
+        self._stop_event.clear()
+        with self._threads_lock:
+            self._resize_workers(self.workers)
+
+    def _resize_workers(self, workers):
+        """调整运行中的上传线程数，调用方需持有 _threads_lock"""
+        while len(self._threads) < workers:
+            retire = threading.Event()
+            thread = threading.Thread(target=self._worker, args=(retire,),
+                                      name=f'upload-worker-{len(self._threads)}', daemon=True)
+            thread.start()
+            self._threads.append((thread, retire))
+        while len(self._threads) > workers:
+            thread, retire = self._threads.pop()
+            retire.set()
+            self._retired.append(thread)
+        self._retired = [thread for thread in self._retired if thread.is_alive()]
+
+    def reconfigure(self, workers=None, max_inflight_bytes=None, weights=None,
+                    max_wait=None, max_retries=None):
+        """
+        运行中调整流水线参数，不停止上传线程也不丢弃队列中的文件
+        参数为 None 时保持不变
+        """
+        if max_inflight_bytes is not None:
+            self.budget.resize(max_inflight_bytes)
+        if weights is not None or max_wait is not None:
+            self.scheduler.reconfigure(weights=weights, max_wait=max_wait)
+        if max_retries is not None:
+            self.max_retries = max_retries
+        if workers is not None and workers != self.workers:
+            self.workers = workers
+            with self._threads_lock:
+                # 尚未 start 时只记录线程数
+                if self._threads:
+                    self._resize_workers(workers)
+
+    def stop(self, wait=True):
+        """
+        停止上传线程
+        wait 为 True 时先等待队列清空；否则把内存队列中剩余的路径写回溢出文件
+        """
+        if wait:
+            self.join()
+        self._stop_event.set()
+        with self._threads_lock:
+            threads = [thread for thread, _ in self._threads] + self._retired
+            self._threads = []
+            self._retired = []
+        for thread in threads:
+            thread.join()
+        if self._spills:
+            self._persist_pending()
+
+    def join(self):
+        """等待所有已提交（包括溢出到磁盘）的文件处理完毕"""
+        while True:
+            self.scheduler.join()
+            with self._spill_lock:
+                if not any(spill.count for spill in self._spills.values()):
+                    return
+            self._refill_from_spill()
+
+    def submit(self, file_path, lane=LIVE, block=True, timeout=None):
+        """
+        提交一个待上传文件
+
+        Args:
+            file_path (str): 文件路径
+            lane (str): 调度通道，见 scheduler.LANES
+
+        Returns:
+            bool: 文件已进入队列或溢出文件时返回 True，阻塞超时返回 False
+        """
+        spill = self._spills.get(lane)
+        if spill:
+            with self._spill_lock:
+                # 该通道已经有溢出的文件时继续写入磁盘，保持提交顺序
+                if spill.count or self.scheduler.full(lane):
+                    spill.append(file_path)
+                    return True
+                self.scheduler.put_nowait(file_path, lane)
+                return True
+        try:
+            self.scheduler.put(file_path, lane, block=block, timeout=timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self):
+        """尚未处理的文件数（内存队列 + 溢出文件）"""
+        with self._spill_lock:
+            return self.scheduler.qsize() + sum(spill.count for spill in self._spills.values())
+
+    def report(self):
+        """返回各通道的排队与等待时间统计"""
+        return self.scheduler.report()
+
+    def _persist_pending(self):
+        """把内存队列和溢出文件中尚未处理的路径按原顺序重新写入各通道的溢出文件"""
+        with self._spill_lock:
+            pending = self.scheduler.drain()
+            for lane, spill in self._spills.items():
+                spill.rewrite(pending[lane])
+
+    def _refill_from_spill(self):
+        """把溢出文件中的路径按顺序搬回各通道的内存队列，直到队列满"""
+        with self._spill_lock:
+            for lane, spill in self._spills.items():
+                if not spill.count:
+                    continue
+                room = self.scheduler.maxsize - self.scheduler.qsize(lane)
+                for file_path in spill.read(room if self.scheduler.maxsize else spill.count):
+                    self.scheduler.put_nowait(file_path, lane)
+
+    def _worker(self, retire):
+        while not self._stop_event.is_set() and not retire.is_set():
+            self._refill_from_spill()
+            try:
+                lane, file_path = self.scheduler.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._process(file_path)
+            except Exception as e:
+                print(f'处理上传任务时出错: {e}')
+            finally:
+                self.scheduler.task_done()
+
+    def _process(self, file_path):
+        """在预算内上传单个文件，失败时放入重试通道；离线时放入发件箱"""
+        if self.outbox and self.outbox.active():
+            # 离线或发件箱还没发完时，新文件排在发件箱末尾，保持同一相册的顺序
+            self._attempts.pop(file_path, None)
+            self.outbox.put(file_path)
+            return
+        try:
+            size = os.path.getsize(file_path)
+        except OSError as e:
+            print(f'无法读取文件大小，跳过: {file_path} ({e})')
+            self._attempts.pop(file_path, None)
+            return
+        charge = self.budget.acquire(size)
+        album = None
+        success = False
+        try:
+            # 计算感知哈希也要解码图片，同样占用字节预算
+            if self.near_duplicate_filter:
+                album = self.uploader.resolve_game_name(file_path)
+                duplicate, _ = self.near_duplicate_filter.check(album, file_path)
+                if duplicate:
+                    self._attempts.pop(file_path, None)
+                    return
+            success = self.uploader.upload_screenshot(file_path)
+        finally:
+            self.budget.release(charge)
+            if album is not None and not success:
+                # 撤销 check 时记录的哈希，和它近似而被跳过的截图重新排队上传
+                for skipped in self.near_duplicate_filter.forget(album, file_path):
+                    if not self.submit(skipped, RETRY, block=False):
+                        print(f'重试队列已满，放弃: {skipped}')
+        if success:
+            self._attempts.pop(file_path, None)
+            return
+        if self.outbox and self.outbox.check_offline():
+            self._attempts.pop(file_path, None)
+            self.outbox.put(file_path)
+            return
+        attempts = self._attempts.get(file_path, 0) + 1
+        if attempts > self.max_retries:
+            print(f'重试 {self.max_retries} 次后仍上传失败，放弃: {file_path}')
+            self._attempts.pop(file_path, None)
+            return
+        self._attempts[file_path] = attempts
+        print(f'上传失败，稍后重试 ({attempts}/{self.max_retries}): {file_path}')
+        if not self.submit(file_path, RETRY, block=False):
+            print(f'重试队列已满，放弃: {file_path}')
+            self._attempts.pop(file_path, None)
@@ -0,0 +1,209 @@
+"""
+运行中按需采集性能数据
+
+守护进程运行几天后变慢或内存增长时，不重启就能查看内部状态：
+发送 SIGUSR1（Windows 上为 Ctrl+Break 对应的 SIGBREAK），或请求本地控制端口
+    curl -X POST "http://127.0.0.1:8765/profile?seconds=30"
+会在后台采集一段时间的数据并写入输出目录：
+- cpu-<时间>.collapsed: 上传相关线程的采样调用栈，collapsed stacks 格式，
+  可直接交给 flamegraph.pl 或 speedscope 生成火焰图
+- memory-<时间>.txt: 采集开始与结束时 tracemalloc 快照的差异，按代码行排序
+未触发时不安装任何 profile/trace 钩子，不产生额外开销。
+"""
+import collections
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 默认只采样上传流水线相关的线程
+PIPELINE_THREAD_PREFIXES = ('upload-worker', 'album-resolver', 'outbox-flusher')
+
+
+def collapse_stack(thread_name, frame):
+    """把线程的当前调用栈转换为 collapsed stacks 格式的一行（不含计数），根在前"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    frames.append(thread_name)
+    return ';'.join(reversed(frames))
+
+
+def sample_stacks(duration, interval=0.005, thread_prefixes=PIPELINE_THREAD_PREFIXES):
+    """
+    每隔 interval 秒采样一次各线程的调用栈
+
+    Args:
+        duration (float): 采样时长（秒）
+        thread_prefixes (tuple): 只采样名称以这些前缀开头的线程，为 None 时采样所有线程
+
+    Returns:
+        collections.Counter: collapsed stack -> 采样次数
+    """
+    counts = collections.Counter()
+    current = threading.get_ident()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        # 每次都重新获取线程名称，运行中增加的上传线程也能采到
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident)
+            if ident == current or name is None:
+                continue
+            if thread_prefixes and not name.startswith(thread_prefixes):
+                continue
+            counts[collapse_stack(name, frame)] += 1
+        time.sleep(interval)
+    return counts
+
+
+def write_collapsed(counts, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in sorted(counts.items()):
+            f.write(f'{stack} {count}\n')
+
+
+def write_memory_diff(before, after, path, limit=50):
+    """按代码行写出两个 tracemalloc 快照之间增长最多的内存分配"""
+    stats = after.compare_to(before, 'lineno')
+    with open(path, 'w', encoding='utf-8') as f:
+        total = sum(stat.size_diff for stat in stats)
+        f.write(f'内存变化合计: {total / 1024:+.1f} KiB\n\n')
+        for stat in stats[:limit]:
+            f.write(f'{stat}\n')
+
+
+class ProfilingHooks:
+    def __init__(self, output_dir='profiles', duration=30.0, interval=0.005,
+                 thread_prefixes=PIPELINE_THREAD_PREFIXES):
+        """
+        初始化性能采集钩子
+
+        Args:
+            output_dir (str): 采集结果的输出目录
+            duration (float): 默认采集时长（秒）
+            interval (float): 调用栈采样间隔（秒）
+            thread_prefixes (tuple): 只采样名称以这些前缀开头的线程，为 None 时采样所有线程
+        """
+        self.output_dir = output_dir
+        self.duration = duration
+        self.interval = interval
+        self.thread_prefixes = thread_prefixes
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = None
+
+    def running(self):
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def trigger(self, duration=None):
+        """
+        在后台开始一次采集，已有采集在进行时忽略
+
+        Returns:
+            dict: {'cpu': 路径, 'memory': 路径}，已有采集在进行时返回 None
+        """
+        duration = self.duration if duration is None else duration
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        paths = {'cpu': os.path.join(self.output_dir, f'cpu-{stamp}.collapsed'),
+                 'memory': os.path.join(self.output_dir, f'memory-{stamp}.txt')}
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                print('性能采集正在进行，忽略本次请求')
+                return None
+            self._thread = threading.Thread(target=self._capture, args=(duration, paths),
+                                            name='profiler', daemon=True)
+            self._thread.start()
+        print(f'开始 {duration:g} 秒的性能采集')
+        return paths
+
+    def wait(self, timeout=None):
+        """等待当前采集完成"""
+        with self._lock:
+            thread = self._thread
+        if thread:
+            thread.join(timeout)
+
+    def _capture(self, duration, paths):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            # 只在采集期间跟踪内存分配，结束后恢复原来的状态
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            try:
+                before = tracemalloc.take_snapshot()
+                counts = sample_stacks(duration, self.interval, self.thread_prefixes)
+                after = tracemalloc.take_snapshot()
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+            write_collapsed(counts, paths['cpu'])
+            write_memory_diff(before, after, paths['memory'])
+            print(f'性能采集完成: {paths["cpu"]}, {paths["memory"]}')
+        except Exception as e:
+            print(f'性能采集时出错: {e}')
+
+    def install_signal(self):
+        """
+        注册触发采集的信号：POSIX 上为 SIGUSR1，Windows 上为 SIGBREAK，只能在主线程调用
+
+        Returns:
+            bool: 当前平台支持时返回 True
+        """
+        signum = getattr(signal, 'SIGUSR1', None) or getattr(signal, 'SIGBREAK', None)
+        if signum is None:
+            return False
+        signal.signal(signum, lambda *_: self.trigger())
+        return True
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        在本地端口启动控制接口：POST /profile?seconds=N 开始采集，返回输出文件路径
+
+        Returns:
+            int: 实际监听的端口（port 为 0 时由系统分配）
+        """
+        hooks = self
+
+        class ControlHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path != '/profile':
+                    self.send_error(404)
+                    return
+                try:
+                    seconds = float(parse_qs(url.query).get('seconds', [hooks.duration])[0])
+                except ValueError:
+                    self.send_error(400, 'seconds 必须是数字')
+                    return
+                paths = hooks.trigger(seconds)
+                body = json.dumps(paths if paths else {'error': 'busy'}).encode('utf-8')
+                self.send_response(202 if paths else 409)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), ControlHandler)
+        threading.Thread(target=self._server.serve_forever, name='profiler-control',
+                         daemon=True).start()
+        print(f'性能采集控制接口: http://{host}:{self._server.server_address[1]}/profile')
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,263 @@
+"""
+核对本地截图与 Google Photos 相册
+
+用法:
+    python reconcile.py [--credentials credentials.json] [--dry-run]
+
+- 按相册分页调用 mediaItems:search（每页 100 个），把 (文件名, 创建时间, 媒体ID)
+  追加写入本地索引文件，不在内存中保留完整的响应
+- 检查点记录每个相册上次核对时的媒体数量，数量没有变化的相册不再请求；
+  有变化的相册只把新出现的媒体追加到索引
+- 监控目录中在对应游戏相册里找不到的截图放入批量补传通道重新上传
+- 配置了多个账号（config.PHOTOS_ACCOUNTS）时核对所有账号中的相册
+"""
+import argparse
+import json
+import os
+from googleapiclient.errors import HttpError
+from uploader import GooglePhotosUploader, rollover_title
+from pipeline import UploadPipeline
+from scheduler import BACKFILL
+from monitor import expand_path_patterns
+from accounts import MultiAccountUploader
+from config import (MONITORING_PATHS, UPLOAD_WORKERS, MAX_INFLIGHT_BYTES, UPLOAD_MAX_RETRIES,
+                    PHOTOS_ACCOUNTS, ACCOUNT_GAME_MAP, ACCOUNT_DAILY_REQUEST_LIMIT)
+
+SUPPORTED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif'}
+
+# mediaItems:search 允许的最大页大小
+SEARCH_PAGE_SIZE = 100
+
+
+class RemoteIndex:
+    """
+    远端媒体索引：每行一个 [相册ID, 文件名, 创建时间, 媒体ID]
+    检查点文件记录每个相册已核对的媒体数量
+    """
+
+    def __init__(self, path, checkpoint_path):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        # 相册ID -> 文件名集合
+        self.filenames = {}
+        self.media_ids = set()
+        self.checkpoint = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        album_id, filename, _, media_id = json.loads(line)
+                    except ValueError:
+                        # 上次中断时可能留下写了一半的最后一行
+                        continue
+                    self._remember(album_id, filename, media_id)
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                self.checkpoint = json.load(f)
+
+    def _remember(self, album_id, filename, media_id):
+        self.filenames.setdefault(album_id, set()).add(filename)
+        self.media_ids.add(media_id)
+
+    def add(self, album_id, items):
+        """
+        把新出现的媒体追加到索引
+
+        Returns:
+            int: 实际新增的数量
+        """
+        added = 0
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for item in items:
+                if item['id'] in self.media_ids:
+                    continue
+                created = item.get('mediaMetadata', {}).get('creationTime', '')
+                f.write(json.dumps([album_id, item['filename'], created, item['id']],
+                                   ensure_ascii=False, separators=(',', ':')) + '\n')
+                self._remember(album_id, item['filename'], item['id'])
+                added += 1
+        return added
+
+    def drop_album(self, album_id):
+        """相册中有媒体被删除时，移除该相册的全部记录，之后重新完整核对"""
+        self.filenames.pop(album_id, None)
+        self.checkpoint.pop(album_id, None)
+        if not os.path.exists(self.path):
+            return
+        # 逐行复制到临时文件再替换，避免把整个索引读入内存
+        tmp_path = self.path + '.tmp'
+        self.media_ids = set()
+        with open(self.path, 'r', encoding='utf-8') as f, \
+                open(tmp_path, 'w', encoding='utf-8') as out:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record[0] != album_id:
+                    out.write(line)
+                    self.media_ids.add(record[3])
+        os.replace(tmp_path, self.path)
+
+    def mark(self, album_id, count):
+        """记录相册已核对到的媒体数量"""
+        self.checkpoint[album_id] = count
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+def list_local_files(directories):
+    """列出监控目录（不含子目录）中的截图文件"""
+    files = []
+    for directory in sorted(directories):
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and \
+                            os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        files.append(entry.path)
+        except OSError as e:
+            print(f'无法读取目录 {directory}: {e}')
+    return sorted(files)
+
+
+class Reconciler:
+    def __init__(self, uploader, index_path='reconcile_index.jsonl',
+                 checkpoint_path='reconcile_checkpoint.json'):
+        """
+        初始化核对器
+
+        Args:
+            uploader: GooglePhotosUploader 或 MultiAccountUploader，相册列表和媒体数量在认证时已加载
+            index_path (str): 远端媒体索引文件路径
+            checkpoint_path (str): 检查点文件路径
+        """
+        self.uploader = uploader
+        # 游戏可能因为配额用完被分配到其他账号，所以每个账号的相册都要核对
+        if isinstance(uploader, MultiAccountUploader):
+            self.account_uploaders = [account.uploader for account in uploader.accounts]
+        else:
+            self.account_uploaders = [uploader]
+        self.index = RemoteIndex(index_path, checkpoint_path)
+
+    def sync_album(self, account_uploader, title, album_id):
+        """
+        把相册中新出现的媒体追加到索引，媒体数量没有变化时不请求
+
+        Returns:
+            int: 新增的媒体数量
+        """
+        count = account_uploader.album_index.counts.get(album_id, 0)
+        known = self.index.checkpoint.get(album_id)
+        if known == count:
+            return 0
+        if known is not None and count < known:
+            print(f'相册 {title} 中有媒体被删除，重新完整核对')
+            self.index.drop_album(album_id)
+
+        added = 0
+        page_token = None
+        while True:
+            body = {'albumId': album_id, 'pageSize': SEARCH_PAGE_SIZE}
+            if page_token:
+                body['pageToken'] = page_token
+            try:
+                response = account_uploader.service.mediaItems().search(body=body).execute()
+            except HttpError as error:
+                # 不更新检查点，下次核对时重新获取该相册
+                print(f'获取相册 {title} 的媒体时出错: {error}')
+                return added
+            added += self.index.add(album_id, response.get('mediaItems', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+        self.index.mark(album_id, count)
+        if added:
+            print(f'相册 {title} 新增 {added} 个媒体')
+        return added
+
+    def _game_albums(self, game_name):
+        """
+        游戏在所有账号中的相册 [(账号的上传器, 标题, 相册ID), ...]，
+        包括 "<游戏名称> (2)" 等切换后的相册
+        """
+        albums = []
+        for account_uploader in self.account_uploaders:
+            index = 1
+            while rollover_title(game_name, index) in account_uploader.albums:
+                title = rollover_title(game_name, index)
+                albums.append((account_uploader, title, account_uploader.albums[title]))
+                index += 1
+        return albums
+
+    def sync(self, game_names):
+        """同步这些游戏的全部相册"""
+        for game_name in sorted(game_names):
+            for account_uploader, title, album_id in self._game_albums(game_name):
+                self.sync_album(account_uploader, title, album_id)
+
+    def missing(self, file_paths):
+        """
+        核对本地文件，返回在对应游戏相册中找不到的文件路径
+
+        Args:
+            file_paths (list): 本地截图路径
+        """
+        groups = {}
+        for file_path in file_paths:
+            groups.setdefault(self.uploader.resolve_game_name(file_path), []).append(file_path)
+        self.sync(groups)
+
+        missing = []
+        for game_name, paths in groups.items():
+            remote = set()
+            for _, _, album_id in self._game_albums(game_name):
+                remote |= self.index.filenames.get(album_id, set())
+            missing.extend(path for path in paths if os.path.basename(path) not in remote)
+        return sorted(missing)
+
+
+def requeue(uploader, file_paths, workers=UPLOAD_WORKERS):
+    """把缺失的文件放入批量补传通道重新上传，等待全部处理完毕"""
+    pipeline = UploadPipeline(uploader, workers=workers,
+                              max_inflight_bytes=MAX_INFLIGHT_BYTES,
+                              max_retries=UPLOAD_MAX_RETRIES)
+    pipeline.start()
+    for file_path in file_paths:
+        pipeline.submit(file_path, BACKFILL)
+    pipeline.stop(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='核对监控目录中的截图是否都已上传到 Google Photos')
+    parser.add_argument('--credentials', default='credentials.json',
+                        help='Google API credentials.json 文件的路径')
+    parser.add_argument('--index', default='reconcile_index.jsonl', help='远端媒体索引文件路径')
+    parser.add_argument('--checkpoint', default='reconcile_checkpoint.json', help='检查点文件路径')
+    parser.add_argument('--dry-run', action='store_true', help='只列出缺失的文件，不重新上传')
+    args = parser.parse_args(argv)
+
+    directories = expand_path_patterns(MONITORING_PATHS)
+    if not directories:
+        print('警告：没有找到任何匹配的目录路径')
+        return 1
+    if PHOTOS_ACCOUNTS:
+        uploader = MultiAccountUploader.from_config(PHOTOS_ACCOUNTS, ACCOUNT_GAME_MAP,
+                                                    daily_limit=ACCOUNT_DAILY_REQUEST_LIMIT)
+    else:
+        uploader = GooglePhotosUploader(args.credentials)
+    reconciler = Reconciler(uploader, index_path=args.index, checkpoint_path=args.checkpoint)
+    local_files = list_local_files(directories)
+    missing = reconciler.missing(local_files)
+    print(f'本地 {len(local_files)} 张截图，{len(missing)} 张不在 Google Photos 中')
+    for file_path in missing:
+        print(f'缺失: {file_path}')
+    if missing and not args.dry_run:
+        requeue(uploader, missing)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
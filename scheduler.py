@@ -0,0 +1,180 @@
+"""
+上传任务优先级调度
+
+待上传文件分为三条通道：
+- live: 刚刚截取的截图
+- retry: 上传失败等待重试的文件
+- backfill: 批量导入、停机后补传等积压文件
+按权重做平滑加权轮询，保证积压很多时新截图也能在几秒内上传；
+同时任何通道队首等待超过 max_wait 秒都会被优先取出，避免低权重通道饿死。
+饥饿保护不会连续生效：积压持续超过 max_wait 时，每次饥饿调度之后
+下一次仍按权重轮询，新截图最多只让出一次，不会排到整个积压队列之后。
+
+调度只在同一个流水线内生效。bulk_import.py 和 reconcile.py 作为独立进程运行时
+不经过监控程序的通道，它们的上传与新截图之间只靠 Google 的配额和带宽分配。
+"""
+import collections
+import queue
+import threading
+import time
+
+LIVE = 'live'
+RETRY = 'retry'
+BACKFILL = 'backfill'
+LANES = (LIVE, RETRY, BACKFILL)
+
+DEFAULT_WEIGHTS = {LIVE: 8, RETRY: 3, BACKFILL: 1}
+
+
+class LaneStats:
+    """单条通道的排队等待时间统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait):
+        self.count += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    @property
+    def avg_wait(self):
+        return self.total_wait / self.count if self.count else 0.0
+
+
+class PriorityScheduler:
+    def __init__(self, weights=None, maxsize=0, max_wait=30.0):
+        """
+        初始化调度器，接口与 queue.Queue 基本一致，put 多一个 lane 参数
+
+        Args:
+            weights (dict): 各通道权重
+            maxsize (int): 每条通道最多容纳的任务数，0 表示不限
+            max_wait (float): 队首任务等待超过该秒数时优先调度
+        """
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.maxsize = maxsize
+        self.max_wait = max_wait
+        self.lanes = {lane: collections.deque() for lane in LANES}
+        self.stats = {lane: LaneStats() for lane in LANES}
+        self._current = {lane: 0 for lane in LANES}
+        # 上一次是否按饥饿保护调度，避免饥饿保护连续生效退化为先进先出
+        self._starved_last = False
+        self._unfinished = 0
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._all_done = threading.Condition(self._mutex)
+
+    def reconfigure(self, weights=None, max_wait=None):
+        """运行中调整通道权重和饥饿保护等待时间"""
+        with self._mutex:
+            if weights:
+                self.weights.update(weights)
+            if max_wait is not None:
+                self.max_wait = max_wait
+
+    def qsize(self, lane=None):
+        with self._mutex:
+            if lane:
+                return len(self.lanes[lane])
+            return sum(len(items) for items in self.lanes.values())
+
+    def full(self, lane=LIVE):
+        with self._mutex:
+            return self._full(lane)
+
+    def _full(self, lane):
+        return 0 < self.maxsize <= len(self.lanes[lane])
+
+    def put(self, item, lane=LIVE, block=True, timeout=None):
+        """放入任务，通道已满时阻塞，超时抛出 queue.Full"""
+        if lane not in self.lanes:
+            raise ValueError(f'未知的上传通道: {lane}')
+        with self._not_full:
+            if self._full(lane):
+                if not block:
+                    raise queue.Full
+                if not self._not_full.wait_for(lambda: not self._full(lane), timeout):
+                    raise queue.Full
+            self.lanes[lane].append((time.monotonic(), item))
+            self._unfinished += 1
+            self._not_empty.notify()
+
+    def put_nowait(self, item, lane=LIVE):
+        self.put(item, lane, block=False)
+
+    def get(self, block=True, timeout=None):
+        """按调度策略取出一个任务，返回 (lane, item)，超时抛出 queue.Empty"""
+        with self._not_empty:
+            if not any(self.lanes.values()):
+                if not block:
+                    raise queue.Empty
+                if not self._not_empty.wait_for(lambda: any(self.lanes.values()), timeout):
+                    raise queue.Empty
+            now = time.monotonic()
+            lane = self._pick(now)
+            enqueued_at, item = self.lanes[lane].popleft()
+            self.stats[lane].record(now - enqueued_at)
+            self._not_full.notify_all()
+            return lane, item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def _pick(self, now):
+        """选择下一个出队的通道，调用方需持有锁"""
+        ready = [lane for lane in LANES if self.lanes[lane]]
+        # 饥饿保护：队首等待最久且超过 max_wait 的通道优先，但不连续两次生效
+        oldest = min(ready, key=lambda lane: self.lanes[lane][0][0])
+        if not self._starved_last and now - self.lanes[oldest][0][0] >= self.max_wait:
+            self._starved_last = True
+            return oldest
+        self._starved_last = False
+        # 平滑加权轮询（只在非空通道之间分配）
+        total = 0
+        for lane in ready:
+            self._current[lane] += self.weights[lane]
+            total += self.weights[lane]
+        chosen = max(ready, key=lambda lane: self._current[lane])
+        self._current[chosen] -= total
+        return chosen
+
+    def drain(self):
+        """取出所有尚未调度的任务，返回 {lane: [item, ...]}，用于停止时保存"""
+        with self._mutex:
+            drained = {}
+            for lane in LANES:
+                drained[lane] = [item for _, item in self.lanes[lane]]
+                self._unfinished -= len(self.lanes[lane])
+                self.lanes[lane].clear()
+            self._unfinished = max(0, self._unfinished)
+            self._not_full.notify_all()
+            if not self._unfinished:
+                self._all_done.notify_all()
+            return drained
+
+    def task_done(self):
+        with self._all_done:
+            self._unfinished -= 1
+            if self._unfinished <= 0:
+                self._unfinished = 0
+                self._all_done.notify_all()
+
+    def join(self):
+        with self._all_done:
+            self._all_done.wait_for(lambda: self._unfinished == 0)
+
+    def report(self):
+        """返回各通道排队长度和等待时间的汇总"""
+        with self._mutex:
+            parts = []
+            for lane in LANES:
+                stats = self.stats[lane]
+                parts.append(f'{lane}: 排队 {len(self.lanes[lane])}, 已调度 {stats.count}, '
+                             f'平均等待 {stats.avg_wait:.1f}s, 最长等待 {stats.max_wait:.1f}s')
+            return '; '.join(parts)
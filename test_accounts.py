@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import Mock
+import os
+import tempfile
+import shutil
+from accounts import Account, MultiAccountUploader, QuotaTracker, stable_shard
+
+class TestMultiAccountUploader(unittest.TestCase):
+    def setUp(self):
+        """
+        测试前的设置:
+        - 创建三个模拟账号，每个账号每天最多 10 个请求
+        - 游戏名称为截图的父文件夹名称
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        self.accounts = []
+        for name in ('a', 'b', 'c'):
+            uploader = Mock()
+            uploader._game_names = {}
+            uploader.resolve_game_name.side_effect = lambda p: os.path.basename(os.path.dirname(p))
+            uploader.upload_screenshot.return_value = True
+            uploader._upload_media.side_effect = lambda p, name=name: f'{name}-{p}'
+            uploader.create_media_items.side_effect = lambda game, uploads: [p for p, _ in uploads]
+            self.accounts.append(Account(name, uploader, QuotaTracker(10)))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_games_routed_by_mapping_or_stable_hash(self):
+        """
+        测试账号分配:
+        - 显式映射优先
+        - 其余游戏按稳定哈希分配，同一游戏总是同一个账号
+        """
+        sharded = MultiAccountUploader(self.accounts, {'Mapped': 'c'})
+        self.assertIs(sharded.account_for('Mapped'), self.accounts[2])
+        expected = self.accounts[stable_shard('Game', 3)]
+        self.assertIs(sharded.account_for('Game'), expected)
+        self.assertTrue(sharded.upload_screenshot('shots/Game/1.png'))
+        expected.uploader.upload_screenshot.assert_called_once_with('shots/Game/1.png')
+        self.assertEqual(expected.quota.used, 2)
+
+    def test_exhausted_account_falls_through(self):
+        """
+        测试配额用完:
+        - 分配到的账号配额不足时改用下一个账号
+        - 所有账号都用完时返回 False
+        """
+        sharded = MultiAccountUploader(self.accounts, {'Game': 'a'})
+        self.accounts[0].quota.charge(9)
+        self.assertTrue(sharded.upload_screenshot('shots/Game/1.png'))
+        self.accounts[1].uploader.upload_screenshot.assert_called_once()
+        for account in self.accounts:
+            account.quota.charge(10)
+        self.assertFalse(sharded.upload_screenshot('shots/Game/2.png'))
+
+    def test_batch_create_uses_uploading_account(self):
+        """
+        测试批量添加:
+        - batchCreate 使用上传文件字节时的同一个账号，即使之后该账号配额用完
+        """
+        sharded = MultiAccountUploader(self.accounts, {'Game': 'a'})
+        token = sharded._upload_media('shots/Game/1.png')
+        self.accounts[0].quota.charge(9)
+        created = sharded.create_media_items('Game', [('shots/Game/1.png', token)])
+        self.assertEqual(created, ['shots/Game/1.png'])
+        self.accounts[0].uploader.create_media_items.assert_called_once_with(
+            'Game', [('shots/Game/1.png', 'a-shots/Game/1.png')])
+
+    def test_quota_persisted_and_reset_daily(self):
+        """
+        测试配额统计:
+        - 写入文件后重启继续累计
+        - 新的一天重新计数
+        """
+        path = os.path.join(self.temp_dir, 'quota.json')
+        day = ['2026-10-19']
+        quota = QuotaTracker(10, path=path, today=lambda: day[0])
+        quota.charge(4)
+        self.assertEqual(QuotaTracker(10, path=path, today=lambda: day[0]).remaining(), 6)
+        day[0] = '2026-10-20'
+        self.assertEqual(quota.remaining(), 10)
+        self.assertEqual(QuotaTracker(10, path=path, today=lambda: day[0]).used, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import shutil
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from google.oauth2.credentials import Credentials
+from async_uploader import AsyncGooglePhotosUploader
+
+class StubPhotosServer:
+    """本地模拟的 Photos Library API 和 Steam appdetails 接口"""
+
+    def __init__(self):
+        self.albums = {'ExistingGame': 'album-existing'}
+        self.created_albums = []
+        self.uploads = {}
+        self.batch_creates = []
+        self.steam_requests = 0
+        self.max_concurrent_uploads = 0
+        self._concurrent_uploads = 0
+        self.app = web.Application()
+        self.app.router.add_get('/v1/albums', self.list_albums)
+        self.app.router.add_post('/v1/albums', self.create_album)
+        self.app.router.add_post('/v1/uploads', self.upload)
+        self.app.router.add_post('/v1/mediaItems:batchCreate', self.batch_create)
+        self.app.router.add_get('/steam/appdetails', self.appdetails)
+
+    async def list_albums(self, request):
+        self._check_auth(request)
+        items = [{'title': title, 'id': album_id} for title, album_id in self.albums.items()]
+        # 每页只返回一个相册，验证分页
+        start = int(request.query.get('pageToken', 0))
+        response = {'albums': items[start:start + 1]}
+        if start + 1 < len(items):
+            response['nextPageToken'] = str(start + 1)
+        return web.json_response(response)
+
+    async def create_album(self, request):
+        self._check_auth(request)
+        title = (await request.json())['album']['title']
+        await asyncio.sleep(0.05)
+        album_id = f'album-{len(self.created_albums)}'
+        self.created_albums.append(title)
+        self.albums[title] = album_id
+        return web.json_response({'id': album_id, 'title': title})
+
+    async def upload(self, request):
+        self._check_auth(request)
+        self._concurrent_uploads += 1
+        self.max_concurrent_uploads = max(self.max_concurrent_uploads, self._concurrent_uploads)
+        try:
+            body = await request.read()
+            await asyncio.sleep(0.01)
+            assert request.headers['X-Goog-Upload-Protocol'] == 'raw'
+            assert int(request.headers['X-Goog-Upload-Content-Length']) == len(body)
+            token = f'token-{len(self.uploads)}'
+            self.uploads[token] = (request.headers['X-Goog-Upload-Content-Type'], body)
+            return web.Response(text=token)
+        finally:
+            self._concurrent_uploads -= 1
+
+    async def batch_create(self, request):
+        self._check_auth(request)
+        body = await request.json()
+        self.batch_creates.append(body)
+        results = []
+        for item in body['newMediaItems']:
+            token = item['simpleMediaItem']['uploadToken']
+            if token in self.uploads:
+                results.append({'uploadToken': token,
+                                'mediaItem': {'id': token, 'productUrl': f'https://photos/{token}'}})
+            else:
+                results.append({'uploadToken': token, 'status': {'message': 'invalid token'}})
+        return web.json_response({'newMediaItemResults': results})
+
+    async def appdetails(self, request):
+        self.steam_requests += 1
+        app_id = request.query['appids']
+        if app_id == '2246340':
+            return web.json_response({app_id: {'success': True, 'data': {'name': 'Monster Hunter Wilds'}}})
+        return web.json_response({app_id: {'success': False}})
+
+    def _check_auth(self, request):
+        if request.headers.get('Authorization') != 'Bearer test_token':
+            raise web.HTTPUnauthorized()
+
+class TestAsyncGooglePhotosUploader(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """
+        测试前的设置:
+        - 启动本地模拟服务
+        - 创建测试截图文件
+        - 创建指向模拟服务的异步上传器
+        """
+        self.stub = StubPhotosServer()
+        self.server = TestServer(self.stub.app)
+        await self.server.start_server()
+        self.temp_dir = tempfile.mkdtemp()
+        self.steam_dir = os.path.join(self.temp_dir, 'Steam', 'userdata', '1', '760', 'remote',
+                                      '2246340', 'screenshots')
+        os.makedirs(self.steam_dir)
+        self.uploader = AsyncGooglePhotosUploader(
+            Credentials(token='test_token'),
+            api_base=str(self.server.make_url('')),
+            steam_appdetails_url=str(self.server.make_url('/steam/appdetails')))
+        await self.uploader.open()
+
+    async def asyncTearDown(self):
+        await self.uploader.close()
+        await self.server.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _make_file(self, directory, name, size=1000):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        return path
+
+    async def test_load_albums_paginates(self):
+        """
+        测试加载相册时读取所有分页
+        """
+        self.stub.albums['SecondGame'] = 'album-second'
+        await self.uploader.load_albums()
+        self.assertEqual(self.uploader.albums, {'ExistingGame': 'album-existing',
+                                                'SecondGame': 'album-second'})
+
+    async def test_upload_screenshot(self):
+        """
+        测试上传单张截图:
+        - 通过 Steam API 解析游戏名称并创建相册
+        - 上传的字节和 MIME 类型正确
+        """
+        path = self._make_file(self.steam_dir, 'shot.png', size=600 * 1024)
+        self.assertTrue(await self.uploader.upload_screenshot(path))
+
+        self.assertEqual(self.stub.created_albums, ['Monster Hunter Wilds'])
+        mime_type, body = self.stub.uploads['token-0']
+        self.assertEqual(mime_type, 'image/png')
+        with open(path, 'rb') as f:
+            self.assertEqual(body, f.read())
+        item = self.stub.batch_creates[0]
+        self.assertEqual(item['albumId'], 'album-0')
+        self.assertEqual(item['newMediaItems'][0]['simpleMediaItem']['fileName'], 'shot.png')
+        self.assertEqual(item['newMediaItems'][0]['description'], 'Screenshot from Monster Hunter Wilds')
+
+    async def test_concurrent_uploads_share_album_and_name(self):
+        """
+        测试大量并发上传:
+        - 所有上传在同一线程中并发进行
+        - 同一目录只请求一次 Steam API，同一相册只创建一次
+        """
+        paths = [self._make_file(self.steam_dir, f'{i}.jpg') for i in range(200)]
+        results = await asyncio.gather(*(self.uploader.upload_screenshot(p) for p in paths))
+
+        self.assertTrue(all(results))
+        self.assertEqual(self.stub.steam_requests, 1)
+        self.assertEqual(self.stub.created_albums, ['Monster Hunter Wilds'])
+        self.assertEqual(len(self.stub.batch_creates), 200)
+        self.assertGreater(self.stub.max_concurrent_uploads, 10)
+
+    async def test_upload_failures(self):
+        """
+        测试上传失败:
+        - 文件不存在返回 False
+        - 认证失败返回 False 而不抛出异常
+        """
+        self.assertFalse(await self.uploader.upload_screenshot(os.path.join(self.temp_dir, 'missing.jpg')))
+        path = self._make_file(os.path.join(self.temp_dir, 'Photos-001'), 'shot.jpg')
+        self.uploader.credentials.token = 'wrong_token'
+        self.assertFalse(await self.uploader.upload_screenshot(path))
+
+    async def test_create_media_items_in_batches(self):
+        """
+        测试批量添加到相册，超过 50 个时分批
+        """
+        directory = os.path.join(self.temp_dir, 'ExistingGame')
+        uploads = []
+        for i in range(60):
+            path = self._make_file(directory, f'{i}.jpg', size=10)
+            uploads.append((path, await self.uploader._upload_media(path)))
+        uploads.append((os.path.join(directory, 'bad.jpg'), 'bad-token'))
+        await self.uploader.load_albums()
+
+        created = await self.uploader.create_media_items('ExistingGame', uploads)
+        self.assertEqual(len(created), 60)
+        self.assertEqual([len(b['newMediaItems']) for b in self.stub.batch_creates], [50, 11])
+        self.assertEqual(self.stub.created_albums, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+from unittest.mock import Mock, patch
+import os
+import tempfile
+import shutil
+from bulk_import import BulkImporter, Checkpoint, scan_tree, main
+
+class TestBulkImport(unittest.TestCase):
+    def setUp(self):
+        """
+        测试前的设置:
+        - 创建包含两个游戏目录的截图库
+        - 创建模拟的上传器
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.temp_dir, 'library')
+        self.checkpoint_path = os.path.join(self.temp_dir, 'checkpoint.jsonl')
+        self.files = {}
+        for game, count in (('GameA', 3), ('GameB', 2)):
+            game_dir = os.path.join(self.root, game, 'screenshots')
+            os.makedirs(game_dir)
+            for i in range(count):
+                path = os.path.join(game_dir, f'{i}.png')
+                with open(path, 'wb') as f:
+                    f.write(f'{game}-{i}'.encode())
+                self.files.setdefault(game, []).append(path)
+        with open(os.path.join(self.root, 'notes.txt'), 'w') as f:
+            f.write('not a screenshot')
+
+        self.mock_uploader = Mock()
+        self.mock_uploader.resolve_game_name.side_effect = \
+            lambda p: os.path.basename(os.path.dirname(os.path.dirname(p)))
+        self.mock_uploader._upload_media.side_effect = lambda p: f'token-{p}'
+        self.mock_uploader.create_media_items.side_effect = \
+            lambda game, uploads: [path for path, _ in uploads]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_scan_tree(self):
+        """
+        测试并行遍历目录树:
+        - 找到所有子目录中的截图
+        - 忽略不支持的文件格式
+        """
+        result = scan_tree(self.root, workers=2)
+        self.assertEqual(len(result), 2)
+        found = sorted(path for files in result.values() for path, _ in files)
+        self.assertEqual(found, sorted(self.files['GameA'] + self.files['GameB']))
+
+    def test_import_groups_by_game(self):
+        """
+        测试导入:
+        - 按游戏分组调用 batchCreate
+        - 所有文件写入检查点
+        """
+        importer = BulkImporter(self.mock_uploader, workers=2, checkpoint_path=self.checkpoint_path)
+        progress = importer.run(self.root)
+
+        self.assertEqual(progress.files, 5)
+        self.assertEqual(progress.failed, 0)
+        calls = {c.args[0]: [path for path, _ in c.args[1]]
+                 for c in self.mock_uploader.create_media_items.call_args_list}
+        self.assertEqual(calls, {'GameA': self.files['GameA'], 'GameB': self.files['GameB']})
+        self.assertEqual(len(Checkpoint(self.checkpoint_path).done_paths), 5)
+
+    def test_resume_skips_completed_files(self):
+        """
+        测试中断后继续:
+        - 检查点中已完成的文件不再上传
+        - 检查点末尾写了一半的记录被忽略
+        """
+        importer = BulkImporter(self.mock_uploader, workers=2, checkpoint_path=self.checkpoint_path)
+        importer.run(self.root)
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+            f.write('{"path": "trunc')
+
+        self.mock_uploader._upload_media.reset_mock()
+        importer = BulkImporter(self.mock_uploader, workers=2, checkpoint_path=self.checkpoint_path)
+        progress = importer.run(self.root)
+        self.assertEqual(progress.total_files, 0)
+        self.mock_uploader._upload_media.assert_not_called()
+
+    def test_duplicate_content_uploaded_once(self):
+        """
+        测试内容去重:
+        - 内容相同的文件只上传一次
+        """
+        copy_path = os.path.join(self.root, 'GameB', 'screenshots', 'copy.png')
+        shutil.copy(self.files['GameA'][0], copy_path)
+        importer = BulkImporter(self.mock_uploader, workers=1, checkpoint_path=self.checkpoint_path)
+        progress = importer.run(self.root)
+
+        self.assertEqual(self.mock_uploader._upload_media.call_count, 5)
+        self.assertEqual(progress.skipped, 1)
+
+    def test_large_group_split_into_batches(self):
+        """
+        测试超过 batchCreate 上限的文件分批添加
+        """
+        game_dir = os.path.join(self.root, 'GameC', 'screenshots')
+        os.makedirs(game_dir)
+        for i in range(120):
+            with open(os.path.join(game_dir, f'{i:03d}.jpg'), 'wb') as f:
+                f.write(str(i).encode())
+        importer = BulkImporter(self.mock_uploader, workers=4, checkpoint_path=self.checkpoint_path)
+        importer.run(self.root)
+
+        sizes = [len(c.args[1]) for c in self.mock_uploader.create_media_items.call_args_list
+                 if c.args[0] == 'GameC']
+        self.assertEqual(sum(sizes), 120)
+        self.assertTrue(all(size <= 50 for size in sizes))
+
+    def test_failed_upload_not_checkpointed(self):
+        """
+        测试上传失败的文件不写入检查点，下次继续导入
+        """
+        failed = self.files['GameA'][1]
+        self.mock_uploader._upload_media.side_effect = \
+            lambda p: None if p == failed else f'token-{p}'
+        importer = BulkImporter(self.mock_uploader, workers=2, checkpoint_path=self.checkpoint_path)
+        progress = importer.run(self.root)
+        self.assertEqual(progress.failed, 1)
+        self.assertNotIn(failed, Checkpoint(self.checkpoint_path).done_paths)
+
+    @patch('bulk_import.GooglePhotosUploader')
+    def test_main_with_invalid_root(self, mock_uploader_class):
+        """
+        测试命令行入口使用不存在的目录
+        """
+        self.assertEqual(main([os.path.join(self.temp_dir, 'missing')]), 1)
+        mock_uploader_class.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import tempfile
+import shutil
+from live_config import ConfigWatcher, load_config_file
+
+class TestLiveConfig(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'monitor_config.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, text, mtime):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_load_validates_settings(self):
+        """
+        测试读取配置文件:
+        - 未知的配置项被忽略
+        - 类型不正确、数值小于 1 或通道名称未知时抛出 ValueError
+        """
+        self._write('{"upload_workers": 4, "unknown": 1}', 1000)
+        self.assertEqual(load_config_file(self.path), {'upload_workers': 4})
+        self._write('{"upload_lane_weights": {"live": 4, "backfill": 1}}', 1000)
+        self.assertEqual(load_config_file(self.path),
+                         {'upload_lane_weights': {'live': 4, 'backfill': 1}})
+        for text in ('{"upload_workers": "4"}',
+                     '{"upload_workers": 0}',
+                     '{"max_inflight_bytes": -1}',
+                     '{"upload_max_retries": 0}',
+                     '{"upload_lane_weights": {"bulk": 1}}',
+                     '{"upload_lane_weights": {"live": 0}}'):
+            self._write(text, 1000)
+            with self.assertRaises(ValueError, msg=text):
+                load_config_file(self.path)
+
+    def test_poll_returns_only_changes(self):
+        """
+        测试检查配置变化:
+        - 文件不存在时返回 None
+        - 修改时间变化时返回新配置，没有变化时返回 None
+        - 内容无效时返回 None，保持当前配置
+        """
+        watcher = ConfigWatcher(self.path)
+        self.assertIsNone(watcher.poll())
+        self._write('{"monitoring_paths": ["a"]}', 1000)
+        self.assertEqual(watcher.poll(), {'monitoring_paths': ['a']})
+        self.assertIsNone(watcher.poll())
+        self._write('{"monitoring_paths": [', 2000)
+        self.assertIsNone(watcher.poll())
+        self._write('{"upload_max_wait": 2.5}', 3000)
+        self.assertEqual(watcher.poll(), {'upload_max_wait': 2.5})
+
+if __name__ == '__main__':
+    unittest.main()
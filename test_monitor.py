@@ -3,7 +3,7 @@ from unittest.mock import Mock, patch
 import os
 import tempfile
 import shutil
-from monitor import ScreenshotHandler, start_monitoring
+from monitor import ScreenshotHandler, start_monitoring, update_watches
 from watchdog.events import FileCreatedEvent
 
 class TestScreenshotHandler(unittest.TestCase):
@@ -49,6 +49,20 @@ class TestScreenshotHandler(unittest.TestCase):
         # 验证上传方法是否被调用
         self.mock_uploader.upload_screenshot.assert_called_once_with(test_file)
 
+    def test_on_created_with_pipeline(self):
+        """
+        测试设置了上传流水线时的处理:
+        - 文件被提交到流水线队列
+        - 不在事件线程中直接上传
+        """
+        mock_pipeline = Mock()
+        handler = ScreenshotHandler(self.mock_uploader, [self.temp_dir], mock_pipeline)
+        test_file = os.path.join(self.temp_dir, "test.png")
+        event = FileCreatedEvent(test_file)
+        handler.on_created(event)
+        mock_pipeline.submit.assert_called_once_with(test_file)
+        self.mock_uploader.upload_screenshot.assert_not_called()
+
     def test_on_created_with_unsupported_extension(self):
         """
         测试创建不支持的文件格式时的处理:
@@ -148,5 +162,28 @@ class TestScreenshotHandler(unittest.TestCase):
         # 验证观察者没有被设置为监控无效路径
         mock_observer.schedule.assert_not_called()
 
+    def test_update_watches_diffs_paths(self):
+        """
+        测试运行中修改监控路径:
+        - 只为新增的目录调用 schedule，只为删除的目录调用 unschedule
+        - 事件处理器的监控目录同步更新
+        """
+        first = os.path.join(self.temp_dir, 'first')
+        second = os.path.join(self.temp_dir, 'second')
+        os.makedirs(first)
+        os.makedirs(second)
+        observer = Mock()
+        observer.schedule.side_effect = lambda handler, path, recursive: f'watch-{path}'
+        watches = {}
+
+        update_watches(observer, self.handler, watches, [first])
+        self.assertEqual(watches, {first: f'watch-{first}'})
+        observer.schedule.reset_mock()
+
+        update_watches(observer, self.handler, watches, [second])
+        observer.unschedule.assert_called_once_with(f'watch-{first}')
+        observer.schedule.assert_called_once_with(self.handler, second, recursive=False)
+        self.assertEqual(self.handler.monitored_paths, {os.path.abspath(second)})
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
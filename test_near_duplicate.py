@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import Mock
+import os
+import tempfile
+import shutil
+import numpy as np
+from PIL import Image
+from near_duplicate import NearDuplicateFilter, dhash, phash, hamming_distances
+from pipeline import UploadPipeline
+
+class TestNearDuplicateFilter(unittest.TestCase):
+    def setUp(self):
+        """
+        测试前的设置:
+        - 生成一张基准截图、一张几乎相同的连拍截图和一张完全不同的截图
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+        burst = base.copy()
+        burst[:5, :5] = 255
+        other = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+        self.base = self._save(base, 'base.png')
+        self.burst = self._save(burst, 'burst.jpg')
+        self.other = self._save(other, 'other.png')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _save(self, pixels, name):
+        path = os.path.join(self.temp_dir, name)
+        Image.fromarray(pixels).save(path, quality=95)
+        return path
+
+    def test_hash_distances(self):
+        """
+        测试感知哈希:
+        - 连拍截图的哈希距离很小
+        - 不同截图的哈希距离很大
+        """
+        for hash_func in (dhash, phash):
+            base = hash_func(self.base)
+            distances = hamming_distances(
+                np.array([hash_func(self.burst), hash_func(self.other)], dtype=np.uint64), base)
+            self.assertLessEqual(distances[0], 6, hash_func.__name__)
+            self.assertGreater(distances[1], 16, hash_func.__name__)
+
+    def test_skip_near_duplicate_in_same_album(self):
+        """
+        测试过滤:
+        - 同一相册中已检查截图的连拍帧被跳过并记录分组
+        - 其他相册和不同的截图不受影响
+        """
+        dup_filter = NearDuplicateFilter(max_distance=6)
+        self.assertFalse(dup_filter.check('Game', self.base)[0])
+
+        self.assertTrue(dup_filter.check('Game', self.burst)[0])
+        self.assertFalse(dup_filter.check('Game', self.other)[0])
+        self.assertFalse(dup_filter.check('OtherGame', self.burst)[0])
+        self.assertEqual(dup_filter.groups, {self.base: [self.burst]})
+
+    def test_old_hashes_expire(self):
+        """
+        测试只和最近上传的截图比较
+        """
+        dup_filter = NearDuplicateFilter(max_distance=6, max_age=-1)
+        dup_filter.check('Game', self.base)
+        self.assertFalse(dup_filter.check('Game', self.burst)[0])
+
+    def test_forget_failed_upload(self):
+        """
+        测试撤销上传失败的截图:
+        - 返回因它被跳过的连拍帧
+        - 之后的连拍帧不再被跳过
+        """
+        dup_filter = NearDuplicateFilter(max_distance=6)
+        dup_filter.check('Game', self.base)
+        dup_filter.check('Game', self.burst)
+        self.assertEqual(dup_filter.forget('Game', self.base), [self.burst])
+        self.assertEqual(dup_filter.groups, {})
+        self.assertFalse(dup_filter.check('Game', self.burst)[0])
+
+    def test_unreadable_image_not_filtered(self):
+        """
+        测试无法解码的文件按不重复处理
+        """
+        broken = os.path.join(self.temp_dir, 'broken.png')
+        with open(broken, 'wb') as f:
+            f.write(b'not an image')
+        self.assertEqual(NearDuplicateFilter().check('Game', broken), (False, None))
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            NearDuplicateFilter(method='ahash')
+
+    def test_pipeline_skips_burst_frames(self):
+        """
+        测试上传流水线中的过滤:
+        - 连拍帧不上传
+        """
+        mock_uploader = Mock()
+        mock_uploader.resolve_game_name.return_value = 'Game'
+        mock_uploader.upload_screenshot.return_value = True
+        pipeline = UploadPipeline(mock_uploader, workers=1,
+                                  near_duplicate_filter=NearDuplicateFilter(max_distance=6))
+        pipeline.start()
+        for path in (self.base, self.burst, self.other):
+            pipeline.submit(path)
+        pipeline.stop()
+        uploaded = [c.args[0] for c in mock_uploader.upload_screenshot.call_args_list]
+        self.assertEqual(uploaded, [self.base, self.other])
+
+    def test_pipeline_requeues_burst_frames_after_failure(self):
+        """
+        测试代表截图上传失败后，被它跳过的连拍帧重新上传
+        """
+        mock_uploader = Mock()
+        mock_uploader.resolve_game_name.return_value = 'Game'
+        dup_filter = NearDuplicateFilter(max_distance=6)
+
+        def upload(path):
+            if path != self.base:
+                return True
+            # 模拟另一个上传线程在代表截图上传期间检查连拍帧
+            self.assertTrue(dup_filter.check('Game', self.burst)[0])
+            return False
+        mock_uploader.upload_screenshot.side_effect = upload
+        pipeline = UploadPipeline(mock_uploader, workers=1, max_retries=0,
+                                  near_duplicate_filter=dup_filter)
+        pipeline.start()
+        pipeline.submit(self.base)
+        pipeline.stop()
+        uploaded = [c.args[0] for c in mock_uploader.upload_screenshot.call_args_list]
+        self.assertEqual(uploaded, [self.base, self.burst])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import Mock
+import os
+import tempfile
+import shutil
+from outbox import Outbox
+from pipeline import UploadPipeline
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        """
+        测试前的设置:
+        - 创建两个游戏目录下的测试文件
+        - 创建记录 batchCreate 调用的模拟上传器，默认网络不可用
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        self.outbox_path = os.path.join(self.temp_dir, 'outbox.jsonl')
+        self.files = []
+        for game in ('GameA', 'GameB'):
+            os.makedirs(os.path.join(self.temp_dir, game))
+            for i in range(3):
+                path = os.path.join(self.temp_dir, game, f'{i}.png')
+                with open(path, 'wb') as f:
+                    f.write(f'{game}-{i}'.encode())
+                self.files.append(path)
+        self.online = False
+        self.mock_uploader = Mock()
+        self.mock_uploader.upload_screenshot.return_value = False
+        self.mock_uploader.resolve_game_name.side_effect = \
+            lambda p: os.path.basename(os.path.dirname(p))
+        self.mock_uploader._upload_media.side_effect = lambda p: f'token-{p}'
+        self.mock_uploader.create_media_items.side_effect = \
+            lambda game, uploads: [path for path, _ in uploads]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _outbox(self):
+        return Outbox(self.mock_uploader, self.outbox_path, probe=lambda: self.online)
+
+    def test_offline_jobs_spooled_and_flushed_in_order(self):
+        """
+        测试断网时暂存、恢复后分批上传:
+        - 上传失败且网络不可用时放入发件箱，不再重试
+        - 离线期间的新文件直接放入发件箱
+        - 恢复后每个游戏按原顺序调用一次 batchCreate
+        """
+        outbox = self._outbox()
+        pipeline = UploadPipeline(self.mock_uploader, workers=1, outbox=outbox)
+        for path in self.files:
+            pipeline._process(path)
+        self.assertEqual(self.mock_uploader.upload_screenshot.call_count, 1)
+        self.assertTrue(outbox.active())
+        self.assertEqual(outbox.pending(), 6)
+
+        self.online = True
+        restored = self._outbox()
+        self.assertEqual(restored.flush(), 6)
+        calls = [(c.args[0], [path for path, _ in c.args[1]])
+                 for c in self.mock_uploader.create_media_items.call_args_list]
+        self.assertEqual(calls, [('GameA', self.files[:3]), ('GameB', self.files[3:])])
+        self.assertEqual(restored.pending(), 0)
+
+    def test_failed_flush_keeps_records_when_offline_again(self):
+        """
+        测试发送途中再次断网:
+        - 没发出去的记录放回发件箱最前面
+        """
+        outbox = self._outbox()
+        for path in self.files:
+            outbox.put(path)
+        self.mock_uploader._upload_media.side_effect = \
+            lambda p: None if 'GameB' in p else f'token-{p}'
+        self.assertEqual(outbox.flush(), 3)
+        self.assertEqual(outbox.pending(), 3)
+
+        self.mock_uploader._upload_media.side_effect = lambda p: f'token-{p}'
+        self.mock_uploader.create_media_items.reset_mock()
+        self.assertEqual(outbox.flush(), 3)
+        self.assertEqual(self.mock_uploader.create_media_items.call_args.args[0], 'GameB')
+
+    def test_steam_game_id_resolved_when_sending(self):
+        """
+        测试离线时解析到的数字游戏ID不记录，发送时重新解析游戏名称
+        """
+        outbox = self._outbox()
+        self.mock_uploader.resolve_game_name.side_effect = lambda p: '2246340'
+        outbox.put(self.files[0])
+        self.mock_uploader.resolve_game_name.side_effect = lambda p: 'Monster Hunter Wilds'
+        self.online = True
+        outbox.flush()
+        self.assertEqual(self.mock_uploader.create_media_items.call_args.args[0],
+                         'Monster Hunter Wilds')
+
+    def test_records_kept_until_batch_sent(self):
+        """
+        测试发送最后一批时:
+        - 记录仍计入 pending，active() 为 True，新截图继续排在发件箱后面
+        - 记录仍在磁盘上，进程此时退出不会丢失
+        - 发送完成后才从发件箱移除
+        """
+        outbox = self._outbox()
+        for path in self.files[:3]:
+            outbox.put(path)
+        self.online = True
+        during = []
+
+        def upload_media(path):
+            restored = Outbox(self.mock_uploader, self.outbox_path)
+            during.append((outbox.active(), outbox.pending(), restored.pending()))
+            return f'token-{path}'
+        self.mock_uploader._upload_media.side_effect = upload_media
+        self.assertEqual(outbox.flush(), 3)
+        self.assertEqual(during[0], (True, 3, 3))
+        self.assertEqual(outbox.pending(), 0)
+        self.assertFalse(outbox.active())
+        self.assertEqual(Outbox(self.mock_uploader, self.outbox_path).pending(), 0)
+
+    def test_flush_stops_between_batches(self):
+        """
+        测试调用 stop() 后发送完当前批次即停止，剩余记录留在发件箱
+        """
+        outbox = Outbox(self.mock_uploader, self.outbox_path, flush_batch=2,
+                        probe=lambda: self.online)
+        for path in self.files:
+            outbox.put(path)
+        self.online = True
+        self.mock_uploader.create_media_items.side_effect = \
+            lambda game, uploads: outbox.stop() or [path for path, _ in uploads]
+        self.assertEqual(outbox.flush(), 2)
+        self.assertEqual(outbox.pending(), 4)
+
+if __name__ == '__main__':
+    unittest.main()
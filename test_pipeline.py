@@ -0,0 +1,222 @@
+import unittest
+from unittest.mock import Mock
+import os
+import tempfile
+import shutil
+import threading
+from pipeline import ByteBudget, UploadPipeline, lane_spill_path
+from scheduler import LIVE, RETRY, BACKFILL
+
+class TestByteBudget(unittest.TestCase):
+    def test_acquire_and_release(self):
+        """
+        测试预算占用与归还:
+        - 预算不足时 acquire 超时返回 False
+        - 归还后可以再次占用
+        """
+        budget = ByteBudget(100)
+        self.assertTrue(budget.acquire(60))
+        self.assertFalse(budget.acquire(60, timeout=0.01))
+        budget.release(60)
+        self.assertTrue(budget.acquire(60, timeout=0.01))
+        self.assertEqual(budget.in_flight, 60)
+
+    def test_oversized_item_takes_whole_budget(self):
+        """
+        测试超过上限的文件:
+        - 单个文件超过上限时独占整个预算而不是永远阻塞
+        """
+        budget = ByteBudget(100)
+        charge = budget.acquire(500, timeout=0.01)
+        self.assertEqual(charge, 100)
+        self.assertEqual(budget.in_flight, 100)
+        self.assertIsNone(budget.acquire(1, timeout=0.01))
+        budget.release(charge)
+        self.assertEqual(budget.in_flight, 0)
+
+    def test_resize_between_acquire_and_release(self):
+        """
+        测试运行中调小预算:
+        - 归还的字节数与占用时相同，不会残留在途字节
+        - 等待中的线程按新的上限重新计算占用
+        """
+        budget = ByteBudget(100)
+        charge = budget.acquire(100)
+        budget.resize(60)
+        budget.release(charge)
+        self.assertEqual(budget.in_flight, 0)
+
+        charge = budget.acquire(60)
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(budget.acquire(100, timeout=5)))
+        waiter.start()
+        budget.resize(40)
+        budget.release(charge)
+        waiter.join()
+        self.assertEqual(result, [40])
+        self.assertEqual(budget.in_flight, 40)
+
+class TestUploadPipeline(unittest.TestCase):
+    def setUp(self):
+        """
+        测试前的设置:
+        - 创建临时目录和若干测试文件
+        - 创建记录上传顺序的模拟上传器
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        self.spill_path = os.path.join(self.temp_dir, 'spill.txt')
+        self.files = []
+        for i in range(5):
+            path = os.path.join(self.temp_dir, f'shot{i}.png')
+            with open(path, 'wb') as f:
+                f.write(b'x' * 40)
+            self.files.append(path)
+        self.uploaded = []
+        self.mock_uploader = Mock()
+        self.mock_uploader.upload_screenshot.side_effect = lambda p: self.uploaded.append(p) or True
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_uploads_all_submitted_files(self):
+        """
+        测试流水线上传所有提交的文件
+        """
+        pipeline = UploadPipeline(self.mock_uploader, workers=3, max_queue=2)
+        pipeline.start()
+        for path in self.files:
+            pipeline.submit(path)
+        pipeline.stop()
+        self.assertEqual(sorted(self.uploaded), sorted(self.files))
+
+    def test_spill_to_disk_when_queue_full(self):
+        """
+        测试队列满时溢出到磁盘:
+        - 超出队列容量的路径写入溢出文件
+        - 启动后按提交顺序全部上传，溢出文件被清空
+        """
+        pipeline = UploadPipeline(self.mock_uploader, workers=1, max_queue=2,
+                                  spill_path=self.spill_path)
+        for path in self.files:
+            self.assertTrue(pipeline.submit(path))
+        self.assertEqual(pipeline.scheduler.qsize(LIVE), 2)
+        with open(lane_spill_path(self.spill_path, LIVE), encoding='utf-8') as f:
+            self.assertEqual(f.read().splitlines(), self.files[2:])
+        self.assertEqual(pipeline.pending(), 5)
+
+        pipeline.start()
+        pipeline.stop()
+        self.assertEqual(self.uploaded, self.files)
+        self.assertEqual(os.path.getsize(lane_spill_path(self.spill_path, LIVE)), 0)
+
+    def test_stop_without_wait_persists_pending(self):
+        """
+        测试不等待直接停止:
+        - 内存队列和溢出文件中的路径按原顺序保存
+        - 新的流水线实例可以从溢出文件恢复
+        """
+        pipeline = UploadPipeline(self.mock_uploader, workers=1, max_queue=2,
+                                  spill_path=self.spill_path)
+        for path in self.files:
+            pipeline.submit(path)
+        pipeline.stop(wait=False)
+        with open(lane_spill_path(self.spill_path, LIVE), encoding='utf-8') as f:
+            self.assertEqual(f.read().splitlines(), self.files)
+
+        restored = UploadPipeline(self.mock_uploader, workers=1, max_queue=2,
+                                  spill_path=self.spill_path)
+        self.assertEqual(restored.pending(), 5)
+        restored.start()
+        restored.stop()
+        self.assertEqual(self.uploaded, self.files)
+
+    def test_submit_blocks_without_spill(self):
+        """
+        测试未配置溢出文件时队列满会阻塞生产者
+        """
+        pipeline = UploadPipeline(self.mock_uploader, workers=1, max_queue=1)
+        self.assertTrue(pipeline.submit(self.files[0]))
+        self.assertFalse(pipeline.submit(self.files[1], timeout=0.01))
+
+    def test_inflight_bytes_within_budget(self):
+        """
+        测试并发上传时在途字节数不超过预算
+        """
+        pipeline = UploadPipeline(self.mock_uploader, workers=4, max_queue=10,
+                                  max_inflight_bytes=80)
+        peak = []
+        lock = threading.Lock()
+
+        def record(path):
+            with lock:
+                peak.append(pipeline.budget.in_flight)
+            return True
+        self.mock_uploader.upload_screenshot.side_effect = record
+
+        pipeline.start()
+        for path in self.files:
+            pipeline.submit(path)
+        pipeline.stop()
+        self.assertEqual(len(peak), 5)
+        self.assertLessEqual(max(peak), 80)
+        self.assertEqual(pipeline.budget.in_flight, 0)
+
+    def test_failed_upload_is_retried(self):
+        """
+        测试上传失败后的重试:
+        - 失败的文件进入重试通道
+        - 超过最大重试次数后放弃
+        """
+        results = {self.files[0]: [False, True], self.files[1]: [False] * 5}
+        calls = []
+
+        def upload(path):
+            calls.append(path)
+            return results[path].pop(0)
+        self.mock_uploader.upload_screenshot.side_effect = upload
+
+        pipeline = UploadPipeline(self.mock_uploader, workers=1, max_retries=2)
+        pipeline.start()
+        pipeline.submit(self.files[0])
+        pipeline.submit(self.files[1])
+        pipeline.stop()
+        self.assertEqual(calls.count(self.files[0]), 2)
+        self.assertEqual(calls.count(self.files[1]), 3)
+        self.assertEqual(pipeline.scheduler.stats[RETRY].count, 3)
+
+    def test_live_lane_not_stuck_behind_backfill(self):
+        """
+        测试积压时新截图的优先级:
+        - 大量 backfill 之后提交的 live 文件很快被调度
+        """
+        pipeline = UploadPipeline(self.mock_uploader, workers=1, max_queue=0)
+        for i in range(50):
+            pipeline.submit(self.files[i % 4], BACKFILL)
+        pipeline.submit(self.files[4], LIVE)
+        pipeline.start()
+        pipeline.stop()
+        self.assertLess(self.uploaded.index(self.files[4]), 2)
+
+    def test_reconfigure_while_running(self):
+        """
+        测试运行中调整参数:
+        - 增减上传线程数，减少的线程处理完当前文件后退出
+        - 预算和调度参数立即生效，队列中的文件全部上传
+        """
+        pipeline = UploadPipeline(self.mock_uploader, workers=1, max_inflight_bytes=40)
+        pipeline.start()
+        pipeline.reconfigure(workers=3, max_inflight_bytes=120, weights={BACKFILL: 5}, max_wait=1)
+        self.assertEqual(len(pipeline._threads), 3)
+        self.assertEqual(pipeline.budget.max_bytes, 120)
+        self.assertEqual(pipeline.scheduler.weights[BACKFILL], 5)
+        self.assertEqual(pipeline.scheduler.max_wait, 1)
+
+        pipeline.reconfigure(workers=1)
+        for path in self.files:
+            pipeline.submit(path)
+        pipeline.stop()
+        self.assertEqual(sorted(self.uploaded), sorted(self.files))
+        self.assertEqual(pipeline._retired, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import tempfile
+import shutil
+import threading
+import json
+import urllib.request
+from profiling import ProfilingHooks, sample_stacks
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        """
+        测试前的设置:
+        - 启动一个名为 upload-worker-0 的忙碌线程
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        self.stop = threading.Event()
+        self.worker = threading.Thread(target=busy_loop, args=(self.stop,), name='upload-worker-0')
+        self.worker.start()
+
+    def tearDown(self):
+        self.stop.set()
+        self.worker.join()
+        shutil.rmtree(self.temp_dir)
+
+    def test_sample_stacks_filters_threads(self):
+        """
+        测试调用栈采样:
+        - 采到上传线程的调用栈，根为线程名称
+        - 不采样其他线程
+        """
+        counts = sample_stacks(0.1, interval=0.001)
+        self.assertTrue(counts)
+        self.assertTrue(all(stack.startswith('upload-worker-0;') for stack in counts))
+        self.assertTrue(any('busy_loop' in stack for stack in counts))
+
+    def test_trigger_writes_profiles(self):
+        """
+        测试触发采集:
+        - 写出 collapsed stacks 和内存快照差异
+        - 采集进行中再次触发被忽略
+        """
+        hooks = ProfilingHooks(os.path.join(self.temp_dir, 'profiles'), duration=0.2, interval=0.001)
+        paths = hooks.trigger()
+        self.assertIsNone(hooks.trigger())
+        hooks.wait()
+        with open(paths['cpu'], encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+        self.assertTrue(os.path.exists(paths['memory']))
+
+    def test_control_endpoint(self):
+        """
+        测试本地控制接口: POST /profile?seconds=N 开始采集并返回输出路径
+        """
+        hooks = ProfilingHooks(os.path.join(self.temp_dir, 'profiles'), interval=0.001)
+        port = hooks.serve(0)
+        try:
+            request = urllib.request.Request(f'http://127.0.0.1:{port}/profile?seconds=0.1',
+                                             method='POST')
+            with urllib.request.urlopen(request) as response:
+                self.assertEqual(response.status, 202)
+                paths = json.loads(response.read())
+            hooks.wait()
+            self.assertTrue(os.path.exists(paths['cpu']))
+        finally:
+            hooks.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+from unittest.mock import Mock
+import os
+import tempfile
+import shutil
+from uploader import AlbumIndex
+from reconcile import Reconciler, RemoteIndex, list_local_files
+from accounts import Account, MultiAccountUploader, QuotaTracker
+
+class TestReconcile(unittest.TestCase):
+    def setUp(self):
+        """
+        测试前的设置:
+        - 创建包含一个游戏目录的监控路径
+        - 创建模拟的上传器，远端相册 Game 中有 0.png 和 1.png
+        """
+        self.temp_dir = tempfile.mkdtemp()
+        self.game_dir = os.path.join(self.temp_dir, 'Game')
+        os.makedirs(self.game_dir)
+        self.files = []
+        for i in range(3):
+            path = os.path.join(self.game_dir, f'{i}.png')
+            with open(path, 'wb') as f:
+                f.write(b'png')
+            self.files.append(path)
+        self.index_path = os.path.join(self.temp_dir, 'index.jsonl')
+        self.checkpoint_path = os.path.join(self.temp_dir, 'checkpoint.json')
+
+        self.mock_uploader = Mock()
+        self.mock_uploader.album_index = AlbumIndex()
+        self.mock_uploader.albums = self.mock_uploader.album_index.albums
+        self.mock_uploader.album_index.add('Game', 'album1', 2)
+        self.mock_uploader.resolve_game_name.side_effect = \
+            lambda p: os.path.basename(os.path.dirname(p))
+        self.remote = {'album1': [self._item('m0', '0.png'), self._item('m1', '1.png')]}
+
+        def search(body):
+            items = self.remote[body['albumId']]
+            start = int(body.get('pageToken', 0))
+            response = {'mediaItems': items[start:start + 1]}
+            if start + 1 < len(items):
+                response['nextPageToken'] = str(start + 1)
+            return Mock(execute=Mock(return_value=response))
+        self.search = self.mock_uploader.service.mediaItems.return_value.search
+        self.search.side_effect = search
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _item(self, media_id, filename):
+        return {'id': media_id, 'filename': filename,
+                'mediaMetadata': {'creationTime': '2026-01-01T00:00:00Z'}}
+
+    def _reconciler(self):
+        return Reconciler(self.mock_uploader, index_path=self.index_path,
+                          checkpoint_path=self.checkpoint_path)
+
+    def test_missing_files_found(self):
+        """
+        测试核对:
+        - 分页获取相册中的全部媒体
+        - 只返回远端不存在的文件
+        """
+        missing = self._reconciler().missing(list_local_files([self.game_dir]))
+        self.assertEqual(missing, [self.files[2]])
+        self.assertEqual(self.search.call_count, 2)
+        self.assertEqual(self.search.call_args_list[0][1]['body']['pageSize'], 100)
+
+    def test_unchanged_album_not_requested(self):
+        """
+        测试增量核对:
+        - 媒体数量没有变化时不再请求，仍使用本地索引
+        - 数量变化后只追加新出现的媒体
+        """
+        self._reconciler().missing(self.files)
+        self.search.reset_mock()
+        self.assertEqual(self._reconciler().missing(self.files), [self.files[2]])
+        self.search.assert_not_called()
+
+        self.remote['album1'].append(self._item('m2', '2.png'))
+        self.mock_uploader.album_index.counts['album1'] = 3
+        self.assertEqual(self._reconciler().missing(self.files), [])
+        with open(self.index_path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_deleted_media_triggers_full_resync(self):
+        """
+        测试远端删除媒体后重新完整核对，被删除的文件重新列为缺失
+        """
+        self._reconciler().missing(self.files)
+        del self.remote['album1'][0]
+        self.mock_uploader.album_index.counts['album1'] = 1
+        missing = self._reconciler().missing(self.files)
+        self.assertEqual(missing, [self.files[0], self.files[2]])
+        self.assertEqual(RemoteIndex(self.index_path, self.checkpoint_path).media_ids, {'m1'})
+
+    def test_rollover_albums_included(self):
+        """
+        测试 "<游戏名称> (2)" 等切换后的相册也参与核对
+        """
+        self.mock_uploader.album_index.add('Game (2)', 'album2', 1)
+        self.remote['album2'] = [self._item('m2', '2.png')]
+        self.assertEqual(self._reconciler().missing(self.files), [])
+
+    def test_albums_in_all_accounts_included(self):
+        """
+        测试多账号时核对每个账号中的游戏相册，各自使用所属账号的 service
+        """
+        other = Mock()
+        other.album_index = AlbumIndex()
+        other.albums = other.album_index.albums
+        other._game_names = {}
+        other.album_index.add('Game', 'album3', 1)
+        other_search = other.service.mediaItems.return_value.search
+        other_search.return_value.execute.return_value = {'mediaItems': [self._item('m2', '2.png')]}
+        self.mock_uploader._game_names = {}
+        multi = MultiAccountUploader([Account('a', self.mock_uploader, QuotaTracker()),
+                                      Account('b', other, QuotaTracker())])
+
+        reconciler = Reconciler(multi, index_path=self.index_path,
+                                checkpoint_path=self.checkpoint_path)
+        self.assertEqual(reconciler.missing(self.files), [])
+        self.assertEqual(other_search.call_args[1]['body']['albumId'], 'album3')
+        self.assertEqual(self.search.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
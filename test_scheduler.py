@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import patch
+import queue
+from scheduler import PriorityScheduler, LIVE, RETRY, BACKFILL
+
+class TestPriorityScheduler(unittest.TestCase):
+    def test_weighted_draining(self):
+        """
+        测试加权轮询:
+        - 各通道都有积压时按权重比例出队
+        """
+        scheduler = PriorityScheduler(weights={LIVE: 3, RETRY: 2, BACKFILL: 1}, max_wait=3600)
+        for lane in (LIVE, RETRY, BACKFILL):
+            for i in range(60):
+                scheduler.put(f'{lane}{i}', lane)
+        lanes = [scheduler.get()[0] for _ in range(60)]
+        self.assertEqual(lanes.count(LIVE), 30)
+        self.assertEqual(lanes.count(RETRY), 20)
+        self.assertEqual(lanes.count(BACKFILL), 10)
+
+    def test_single_lane_keeps_fifo_order(self):
+        """
+        测试只有一条通道有任务时按先进先出顺序出队
+        """
+        scheduler = PriorityScheduler()
+        for i in range(5):
+            scheduler.put(i, BACKFILL)
+        self.assertEqual([scheduler.get()[1] for _ in range(5)], list(range(5)))
+
+    def test_starvation_protection(self):
+        """
+        测试饥饿保护:
+        - 队首等待超过 max_wait 的通道优先出队，即使权重很低
+        """
+        scheduler = PriorityScheduler(weights={LIVE: 100, BACKFILL: 1}, max_wait=0)
+        scheduler.put('old', BACKFILL)
+        for i in range(5):
+            scheduler.put(f'live{i}', LIVE)
+        self.assertEqual(scheduler.get(), (BACKFILL, 'old'))
+
+    @patch('scheduler.time.monotonic')
+    def test_live_not_stuck_behind_steady_backlog(self, mock_clock):
+        """
+        测试积压持续超过 max_wait 时:
+        - 饥饿保护不连续生效，新截图最多等待一次调度
+        - 积压的 backfill 仍然持续出队
+        """
+        mock_clock.return_value = 0.0
+        scheduler = PriorityScheduler(maxsize=100, max_wait=30)
+        for i in range(100):
+            scheduler.put(f'backfill{i}', BACKFILL)
+        dispatched = []
+        for second in range(1, 121):
+            mock_clock.return_value = float(second)
+            if second == 60:
+                scheduler.put('live', LIVE)
+            dispatched.append(scheduler.get())
+            # 每秒补充 backfill，保持队列满
+            if not scheduler.full(BACKFILL):
+                scheduler.put(f'backfill{100 + second}', BACKFILL)
+        live_at = dispatched.index((LIVE, 'live'))
+        self.assertLessEqual(live_at - 59, 1)
+        self.assertEqual(sum(lane == BACKFILL for lane, _ in dispatched), 119)
+
+    def test_full_and_empty(self):
+        """
+        测试通道容量和空队列:
+        - 通道满时非阻塞放入抛出 queue.Full
+        - 其他通道不受影响
+        - 空队列非阻塞取出抛出 queue.Empty
+        """
+        scheduler = PriorityScheduler(maxsize=1)
+        scheduler.put('a', LIVE)
+        self.assertTrue(scheduler.full(LIVE))
+        with self.assertRaises(queue.Full):
+            scheduler.put('b', LIVE, block=False)
+        scheduler.put('c', BACKFILL, block=False)
+        scheduler.get()
+        scheduler.get()
+        with self.assertRaises(queue.Empty):
+            scheduler.get(timeout=0.01)
+        with self.assertRaises(ValueError):
+            scheduler.put('d', 'unknown')
+
+    def test_wait_stats_and_drain(self):
+        """
+        测试等待时间统计和停止时取出剩余任务
+        """
+        scheduler = PriorityScheduler()
+        scheduler.put('a', LIVE)
+        scheduler.put('b', RETRY)
+        scheduler.put('c', RETRY)
+        scheduler.get()
+        scheduler.task_done()
+        self.assertEqual(scheduler.stats[LIVE].count, 1)
+        self.assertGreaterEqual(scheduler.stats[LIVE].max_wait, 0)
+        self.assertIn('live', scheduler.report())
+        self.assertEqual(scheduler.drain(), {LIVE: [], RETRY: ['b', 'c'], BACKFILL: []})
+        scheduler.join()
+
+if __name__ == '__main__':
+    unittest.main()
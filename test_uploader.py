@@ -5,8 +5,9 @@ import pickle
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.errors import HttpError
-from uploader import GooglePhotosUploader
+from uploader import GooglePhotosUploader, AlbumIndex
 import requests
+import threading
 
 class TestGooglePhotosUploader(unittest.TestCase):
     def setUp(self):
@@ -133,6 +134,7 @@ class TestGooglePhotosUploader(unittest.TestCase):
         def exists_side_effect(path):
             return path == self.test_credentials_path
         self.mock_exists_func.side_effect = exists_side_effect
+        mock_build.return_value.albums.return_value.list.return_value.execute.return_value = {'albums': []}
         
         uploader = GooglePhotosUploader(self.test_credentials_path)
         
@@ -151,6 +153,7 @@ class TestGooglePhotosUploader(unittest.TestCase):
         - 测试普通文件夹路径
         - 测试无效路径
         """
+        mock_build.return_value.albums.return_value.list.return_value.execute.return_value = {'albums': []}
         uploader = GooglePhotosUploader(self.test_credentials_path)
         
         # 模拟成功的Steam API响应
@@ -457,5 +460,168 @@ class TestGooglePhotosUploader(unittest.TestCase):
             result = uploader.upload_screenshot('nonexistent/file.jpg')
             self.assertFalse(result)
 
+    @patch('uploader.build')
+    def test_create_media_items_in_batches(self, mock_build):
+        """
+        测试批量添加到相册:
+        - 超过 50 个文件时分多次调用 batchCreate
+        - 只返回成功创建的文件
+        """
+        mock_service = Mock()
+        mock_albums = Mock()
+        mock_service.albums.return_value = mock_albums
+        mock_build.return_value = mock_service
+        mock_albums.list.return_value.execute.return_value = {'albums': [{'title': 'Game', 'id': 'album1'}]}
+
+        def batch_create(body):
+            results = [{'mediaItem': {'id': item['simpleMediaItem']['uploadToken']}}
+                       for item in body['newMediaItems']]
+            results[0] = {'status': {'message': 'failed'}}
+            request = Mock()
+            request.execute.return_value = {'newMediaItemResults': results}
+            return request
+        mock_service.mediaItems.return_value.batchCreate.side_effect = batch_create
+
+        uploader = GooglePhotosUploader(self.test_credentials_path)
+        uploads = [(f'dir/{i}.png', f'token{i}') for i in range(120)]
+        created = uploader.create_media_items('Game', uploads)
+
+        calls = mock_service.mediaItems.return_value.batchCreate.call_args_list
+        self.assertEqual([len(c[1]['body']['newMediaItems']) for c in calls], [50, 50, 20])
+        self.assertTrue(all(c[1]['body']['albumId'] == 'album1' for c in calls))
+        self.assertEqual(len(created), 117)
+        self.assertNotIn('dir/0.png', created)
+        self.assertEqual(uploader.create_media_items('Game', []), [])
+
+    @patch('uploader.build')
+    def test_resolve_game_name_cached_per_directory(self, mock_build):
+        """
+        测试游戏名称缓存:
+        - 同一目录只调用一次 get_game_name_from_path
+        - Steam API 失败返回游戏ID时不缓存
+        """
+        mock_service = Mock()
+        mock_service.albums.return_value.list.return_value.execute.return_value = {'albums': []}
+        mock_build.return_value = mock_service
+        uploader = GooglePhotosUploader(self.test_credentials_path)
+
+        with patch.object(uploader, 'get_game_name_from_path', return_value='Game') as mock_get:
+            self.assertEqual(uploader.resolve_game_name('a/dir/1.png'), 'Game')
+            self.assertEqual(uploader.resolve_game_name('a/dir/2.png'), 'Game')
+            self.assertEqual(mock_get.call_count, 1)
+
+        with patch.object(uploader, 'get_game_name_from_path', return_value='2246340') as mock_get:
+            uploader.resolve_game_name('b/2246340/1.png')
+            uploader.resolve_game_name('b/2246340/2.png')
+            self.assertEqual(mock_get.call_count, 2)
+
+    @patch('uploader.build')
+    def test_upload_overlaps_album_creation(self, mock_build):
+        """
+        测试上传文件字节与相册解析并行:
+        - 创建相册尚未完成时文件字节已经开始上传
+        - 两者完成后才调用 batchCreate
+        - 相册已缓存时不再提交后台任务
+        """
+        mock_service = Mock()
+        mock_albums = Mock()
+        mock_service.albums.return_value = mock_albums
+        mock_build.return_value = mock_service
+        mock_albums.list.return_value.execute.return_value = {'albums': []}
+        mock_service.mediaItems.return_value.batchCreate.return_value.execute.return_value = {
+            'newMediaItemResults': [{'mediaItem': {'id': 'media1', 'productUrl': 'url'}}]
+        }
+
+        upload_started = threading.Event()
+        album_created = threading.Event()
+
+        def create_album(body):
+            # 相册创建要等到文件字节开始上传之后才能完成，串行执行会超时失败
+            self.assertTrue(upload_started.wait(5))
+            album_created.set()
+            request = Mock()
+            request.execute.return_value = {'id': 'album1'}
+            return request
+        mock_albums.create.side_effect = create_album
+
+        uploader = GooglePhotosUploader(self.test_credentials_path)
+
+        def upload_media(path):
+            self.assertFalse(album_created.is_set())
+            upload_started.set()
+            return 'upload_token'
+
+        with patch.object(uploader, '_upload_media', side_effect=upload_media), \
+             patch.object(uploader, 'get_game_name_from_path', return_value='NewGame'):
+            self.assertTrue(uploader.upload_screenshot('shots/NewGame/1.png'))
+            body = mock_service.mediaItems.return_value.batchCreate.call_args[1]['body']
+            self.assertEqual(body['albumId'], 'album1')
+
+            with patch.object(uploader._album_executor, 'submit') as mock_submit, \
+                 patch.object(uploader, '_upload_media', return_value='upload_token2'):
+                self.assertTrue(uploader.upload_screenshot('shots/NewGame/2.png'))
+                mock_submit.assert_not_called()
+
+    @patch('uploader.build')
+    def test_create_media_items_rolls_over_full_album(self, mock_build):
+        """
+        测试相册接近上限时自动切换:
+        - 加载相册时记录 mediaItemsCount
+        - 当前相册放不下时创建 "<游戏名称> (2)" 并写入新相册
+        - 之后的截图继续使用新相册，不再请求 API
+        """
+        mock_service = Mock()
+        mock_albums = Mock()
+        mock_service.albums.return_value = mock_albums
+        mock_build.return_value = mock_service
+        mock_albums.list.return_value.execute.return_value = {
+            'albums': [{'title': 'Game', 'id': 'album1', 'mediaItemsCount': '19990'}]
+        }
+        mock_albums.create.return_value.execute.return_value = {'id': 'album2'}
+        mock_service.mediaItems.return_value.batchCreate.side_effect = lambda body: Mock(
+            execute=Mock(return_value={'newMediaItemResults': [
+                {'mediaItem': {'id': item['simpleMediaItem']['uploadToken']}}
+                for item in body['newMediaItems']]}))
+
+        uploader = GooglePhotosUploader(self.test_credentials_path)
+        uploads = [(f'dir/{i}.png', f'token{i}') for i in range(60)]
+        created = uploader.create_media_items('Game', uploads)
+
+        self.assertEqual(len(created), 60)
+        mock_albums.create.assert_called_once_with(body={'album': {'title': 'Game (2)'}})
+        calls = mock_service.mediaItems.return_value.batchCreate.call_args_list
+        self.assertEqual([c[1]['body']['albumId'] for c in calls], ['album2', 'album2'])
+        self.assertEqual(uploader.album_index.counts['album2'], 60)
+
+        mock_albums.list.reset_mock()
+        uploader.create_media_items('Game', [('dir/x.png', 'tokenx')])
+        self.assertEqual(calls[-1][1]['body']['albumId'], 'album2')
+        mock_albums.create.assert_called_once()
+        mock_albums.list.assert_not_called()
+
+class TestAlbumIndex(unittest.TestCase):
+    def test_title_for_rolls_over_and_caches_active_album(self):
+        """
+        测试相册索引:
+        - 相册未满时使用游戏名称
+        - 放不下时切换到下一个标题，已存在的 (2) 相册会被复用
+        - 失败归还容量后仍停留在当前相册
+        """
+        index = AlbumIndex(item_limit=10)
+        self.assertEqual(index.title_for('Game'), 'Game')
+
+        index.add('Game', 'album1', 10)
+        index.add('Game (2)', 'album2', 3)
+        self.assertEqual(index.title_for('Game'), 'Game (2)')
+
+        index.reserve('album2', 7)
+        self.assertEqual(index.title_for('Game'), 'Game (3)')
+        index.release('album2', 1)
+        self.assertEqual(index.title_for('Game'), 'Game (3)')
+        self.assertEqual(index.counts['album2'], 9)
+
+        index.add('Other', 'album3', 9)
+        self.assertEqual(index.title_for('Other', 2), 'Other (2)')
+
 if __name__ == '__main__':
     unittest.main(verbosity=2) 
\ No newline at end of file
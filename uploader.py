@@ -1,6 +1,10 @@
 import os
 import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httplib2
 import requests
+import google_auth_httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -12,62 +16,205 @@ import re
 SCOPES = ['https://www.googleapis.com/auth/photoslibrary',
           'https://www.googleapis.com/auth/photoslibrary.sharing']
 
+# mediaItems.batchCreate 每次最多添加的媒体数量
+BATCH_CREATE_LIMIT = 50
+
+STEAM_APPDETAILS_URL = 'https://store.steampowered.com/api/appdetails'
+# 无法从路径中识别游戏时使用的相册名称
+DEFAULT_GAME_NAME = "未分类游戏截图"
+# Google Photos 每个相册最多容纳的媒体数量
+ALBUM_ITEM_LIMIT = 20000
+
+def rollover_title(game_name, index):
+    """游戏的第 index 个相册标题：第一个为游戏名称，之后为 "<游戏名称> (2)"、"(3)" ……"""
+    return game_name if index == 1 else f'{game_name} ({index})'
+
+class AlbumIndex:
+    """
+    相册索引：标题 -> 相册ID、每个相册的媒体数量，以及每个游戏当前写入的相册
+    相册接近上限时自动切换到下一个标题，选择相册只查本地索引，不需要额外的 API 请求
+    """
+
+    def __init__(self, item_limit=ALBUM_ITEM_LIMIT):
+        self.item_limit = item_limit
+        self.albums = {}
+        self.counts = {}
+        # 游戏名称 -> 当前使用的相册序号
+        self._active = {}
+
+    def add(self, title, album_id, count=0):
+        """记录一个已存在的相册及其媒体数量"""
+        self.albums[title] = album_id
+        self.counts[album_id] = count
+
+    def title_for(self, game_name, count=1):
+        """
+        返回游戏接下来 count 张截图应写入的相册标题
+        当前相册放不下时滚动到下一个标题（该相册可能还未创建）
+        """
+        index = self._active.get(game_name)
+        if index is None:
+            # 第一次使用时从已加载的相册中找到序号最大的一个
+            index = 1
+            while rollover_title(game_name, index + 1) in self.albums:
+                index += 1
+        while True:
+            title = rollover_title(game_name, index)
+            album_id = self.albums.get(title)
+            if album_id is None or self.counts.get(album_id, 0) + count <= self.item_limit:
+                break
+            index += 1
+        self._active[game_name] = index
+        return title
+
+    def reserve(self, album_id, count):
+        """为即将添加的截图预留相册容量"""
+        self.counts[album_id] = self.counts.get(album_id, 0) + count
+
+    def release(self, album_id, count):
+        """添加失败时归还预留的容量"""
+        self.counts[album_id] = max(0, self.counts.get(album_id, 0) - count)
+
+def steam_app_id_from_path(file_path):
+    """
+    从 Steam 截图路径中提取游戏ID
+    Steam路径格式 (E:/Steam/userdata/3350395/760/remote/2246340/test.jpg) 返回 "2246340"，
+    不是 Steam 路径或 remote 后面不是数字ID时返回 None
+    """
+    # 将路径分隔符统一为正斜杠
+    normalized_path = file_path.replace('\\', '/')
+    parts = normalized_path.split('/')
+    
+    # 如果是Steam路径，查找 'remote' 的位置，游戏ID在它后面
+    if 'Steam' in normalized_path and 'remote' in parts:
+        remote_index = parts.index('remote')
+        if len(parts) > remote_index + 1:
+            game_id = parts[remote_index + 1]
+            # 确保获取到的是数字ID
+            if game_id.isdigit():
+                return game_id
+    return None
+
+def steam_name_from_appdetails(game_id, data):
+    """从 Steam appdetails 接口的响应中取出游戏名称，失败返回 None"""
+    if data and data.get(game_id, {}).get('success'):
+        return data[game_id]['data']['name']
+    return None
+
+def folder_name_from_path(file_path):
+    """普通路径返回父文件夹名称 (C:/Users/47122/Desktop/Photos-001/test.jpg -> Photos-001)"""
+    parent_dir = os.path.basename(os.path.dirname(file_path))
+    if parent_dir:
+        return parent_dir
+    return DEFAULT_GAME_NAME
+
+def load_credentials(credentials_path='credentials.json', token_path='token.pickle'):
+    """
+    加载或获取 Google Photos 认证信息
+
+    Args:
+        credentials_path (str): Google API credentials.json 文件的路径
+        token_path (str): 保存认证信息的 token 文件路径
+
+    Returns:
+        Credentials: 有效的认证信息
+    """
+    credentials = None
+    if os.path.exists(token_path):
+        with open(token_path, 'rb') as token:
+            credentials = pickle.load(token)
+
+    # 如果没有认证信息，或认证信息无效，需要进行认证流程
+    if not credentials or not credentials.valid:
+        # 如果有认证信息，但已过期，且有刷新令牌，则尝试刷新认证
+        if credentials and credentials.expired and credentials.refresh_token:
+            credentials.refresh(Request())
+        # 如果无法刷新（没有认证信息或无刷新令牌），需要重新进行完整的认证流程
+        else:
+            # 首先检查 credentials.json 文件是否存在
+            # 这个文件包含了 OAuth 2.0 客户端 ID 和密钥，从 Google Cloud Console 下载
+            if not os.path.exists(credentials_path):
+                raise FileNotFoundError(f'Credentials file not found at: {credentials_path}')
+
+            # 使用 credentials.json 创建认证流程
+            # InstalledAppFlow 用于桌面应用的 OAuth 2.0 认证
+            # 这会打开浏览器让用户登录 Google 账号并授权
+            flow = InstalledAppFlow.from_client_secrets_file(
+                credentials_path, SCOPES)
+            credentials = flow.run_local_server(port=0)
+
+        # 认证成功后，将认证信息保存到 token 文件
+        # 这样下次运行时可以直接加载，不需要重新认证
+        with open(token_path, 'wb') as token:
+            pickle.dump(credentials, token)
+
+    return credentials
+
 class GooglePhotosUploader:
-    def __init__(self, credentials_path='credentials.json'):
+    def __init__(self, credentials_path='credentials.json', token_path='token.pickle'):
         """
         初始化 Google Photos 上传器
         
         Args:
             credentials_path (str): Google API credentials.json 文件的路径
+            token_path (str): 保存认证信息的 token 文件路径，每个账号使用各自的文件
         """
         self.credentials_path = credentials_path
+        self.token_path = token_path
         self.credentials = None
         self.service = None
-        self.albums = {}
+        self.album_index = AlbumIndex()
+        self.albums = self.album_index.albums
+        # 多个上传线程可能同时为同一游戏创建相册
+        self._album_lock = threading.Lock()
+        # 目录 -> 游戏名称，同一目录下的截图只解析一次
+        self._game_names = {}
+        self._name_lock = threading.Lock()
+        # 解析游戏名称、创建相册的后台线程，与上传文件字节并行
+        self._album_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='album-resolver')
+        self._local = threading.local()
+        self._owner_thread = None
         self.authenticate()
 
     def authenticate(self):
         """处理Google Photos认证"""
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                self.credentials = pickle.load(token)
-
-        # 如果没有认证信息，或认证信息无效，需要进行认证流程
-        if not self.credentials or not self.credentials.valid:
-            # 如果有认证信息，但已过期，且有刷新令牌，则尝试刷新认证
-            if self.credentials and self.credentials.expired and self.credentials.refresh_token:
-                self.credentials.refresh(Request())
-            # 如果无法刷新（没有认证信息或无刷新令牌），需要重新进行完整的认证流程
-            else:
-                # 首先检查 credentials.json 文件是否存在
-                # 这个文件包含了 OAuth 2.0 客户端 ID 和密钥，从 Google Cloud Console 下载
-                if not os.path.exists(self.credentials_path):
-                    raise FileNotFoundError(f'Credentials file not found at: {self.credentials_path}')
-                
-                # 使用 credentials.json 创建认证流程
-                # InstalledAppFlow 用于桌面应用的 OAuth 2.0 认证
-                # 这会打开浏览器让用户登录 Google 账号并授权
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_path, SCOPES)
-                self.credentials = flow.run_local_server(port=0)
-
-            # 认证成功后，将认证信息保存到 token.pickle 文件
-            # 这样下次运行时可以直接加载，不需要重新认证
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(self.credentials, token)
+        self.credentials = load_credentials(self.credentials_path, self.token_path)
 
         self.service = build('photoslibrary', 'v1', 
                             credentials=self.credentials,
                             static_discovery=False,
                             discoveryServiceUrl='https://photoslibrary.googleapis.com/$discovery/rest?version=v1')
+        self._owner_thread = threading.get_ident()
+        self._local = threading.local()
         self._load_albums()
 
+    def _http(self):
+        """
+        获取当前线程可用的 HTTP 连接
+        service 自带的 httplib2 连接不是线程安全的，只给创建它的线程使用，
+        其他上传线程各自持有一个独立的已授权连接
+        """
+        if threading.get_ident() == self._owner_thread:
+            return self.service._http
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
+
     def _load_albums(self):
         """加载所有相册信息"""
         try:
-            response = self.service.albums().list().execute()
-            for album in response.get('albums', []):
-                self.albums[album['title']] = album['id']
+            page_token = None
+            while True:
+                response = self.service.albums().list(pageSize=50, pageToken=page_token).execute()
+                for album in response.get('albums', []):
+                    self.album_index.add(album['title'], album['id'],
+                                         int(album.get('mediaItemsCount', 0)))
+                page_token = response.get('nextPageToken')
+                # 响应格式异常时也要结束，避免无限翻页
+                if not isinstance(page_token, str) or not page_token:
+                    break
         except HttpError as error:
             print(f'加载相册时出错: {error}')
 
@@ -81,7 +228,7 @@ class GooglePhotosUploader:
                 
             album = self.service.albums().create(
                 body={'album': {'title': title}}
-            ).execute()
+            ).execute(http=self._http())
             self.albums[title] = album['id']
             print(f'成功创建相册: {title}')
             return album['id']
@@ -96,92 +243,212 @@ class GooglePhotosUploader:
         - 普通路径格式 (C:/Users/47122/Desktop/Photos-001/test.jpg): 返回 Photos-001
         """
         try:
-            # 将路径分隔符统一为正斜杠
-            normalized_path = file_path.replace('\\', '/')
-            parts = normalized_path.split('/')
-            
-            # 如果是Steam路径，查找 'remote' 的位置，游戏ID在它后面
-            if 'Steam' in normalized_path and 'remote' in parts:
-                remote_index = parts.index('remote')
-                if len(parts) > remote_index + 1:
-                    game_id = parts[remote_index + 1]
-                    # 确保获取到的是数字ID
-                    if game_id.isdigit():
-                        # 尝试从Steam API获取游戏名称
-                        try:
-                            response = requests.get(f'https://store.steampowered.com/api/appdetails?appids={game_id}')
-                            if response.status_code == 200:
-                                data = response.json()
-                                if data and data.get(game_id, {}).get('success'):
-                                    game_name = data[game_id]['data']['name']
-                                    print(f'从Steam API获取到游戏名称: {game_name}')
-                                    return game_name
-                        except Exception as e:
-                            print(f"从Steam API获取游戏名称时出错: {e}")
-                        # 如果API调用失败，返回游戏ID
-                        return game_id
+            game_id = steam_app_id_from_path(file_path)
+            if game_id:
+                # 尝试从Steam API获取游戏名称
+                try:
+                    response = requests.get(f'{STEAM_APPDETAILS_URL}?appids={game_id}')
+                    if response.status_code == 200:
+                        game_name = steam_name_from_appdetails(game_id, response.json())
+                        if game_name:
+                            print(f'从Steam API获取到游戏名称: {game_name}')
+                            return game_name
+                except Exception as e:
+                    print(f"从Steam API获取游戏名称时出错: {e}")
+                # 如果API调用失败，返回游戏ID
+                return game_id
             
             # 如果不是Steam路径或无法获取游戏ID，返回父文件夹名称
-            parent_dir = os.path.basename(os.path.dirname(file_path))
-            if parent_dir:
-                return parent_dir
-            
-            return "未分类游戏截图"
+            return folder_name_from_path(file_path)
         except Exception as e:
             print(f"提取游戏名称时出错: {e}")
-            return "未分类游戏截图"
+            return DEFAULT_GAME_NAME
+
+    def resolve_game_name(self, file_path):
+        """
+        带缓存的 get_game_name_from_path，同一目录下的文件只解析一次
+        Steam API 调用失败时返回的游戏ID不缓存，下次再尝试获取游戏名称
+        """
+        directory = os.path.dirname(file_path)
+        with self._name_lock:
+            if directory in self._game_names:
+                return self._game_names[directory]
+        game_name = self.get_game_name_from_path(file_path)
+        if not game_name.isdigit():
+            with self._name_lock:
+                self._game_names[directory] = game_name
+        return game_name
+
+    def _ensure_album(self, game_name, count=1):
+        """
+        选择游戏当前的相册并为 count 张截图预留容量，相册不存在时创建
+        当前相册已接近上限时自动切换到 "<游戏名称> (2)" 等新相册
+
+        Returns:
+            str: 相册ID，失败返回 None
+        """
+        with self._album_lock:
+            title = self.album_index.title_for(game_name, count)
+            if title not in self.albums:
+                if title != game_name:
+                    print(f'相册已接近 {self.album_index.item_limit} 张上限，切换到新相册: {title}')
+                album_id = self.create_album(title)
+                if not album_id:
+                    print(f'创建相册失败: {title}')
+                    return None
+            album_id = self.albums[title]
+            self.album_index.reserve(album_id, count)
+            return album_id
+
+    def _resolve_album(self, file_path):
+        """解析游戏名称并确保相册存在，返回 (游戏名称, 相册ID)"""
+        game_name = self.resolve_game_name(file_path)
+        return game_name, self._ensure_album(game_name)
+
+    def _cached_album(self, file_path):
+        """
+        游戏名称已缓存且当前相册已存在时直接返回 (游戏名称, 相册ID)，不需要网络请求；
+        否则返回 None
+        """
+        with self._name_lock:
+            game_name = self._game_names.get(os.path.dirname(file_path))
+        if not game_name:
+            return None
+        with self._album_lock:
+            if self.album_index.title_for(game_name) not in self.albums:
+                return None
+        return game_name, self._ensure_album(game_name)
 
     def upload_screenshot(self, file_path):
         """上传截图到Google Photos"""
         try:
-            # 从路径获取游戏名称
-            game_name = self.get_game_name_from_path(file_path)
+            # 解析游戏名称（Steam API）和创建相册都需要网络请求；上传 token 不依赖相册，
+            # 所以在后台解析相册的同时立即上传文件字节，只在 batchCreate 前汇合
+            album = self._cached_album(file_path)
+            album_future = None
+            if album is None:
+                album_future = self._album_executor.submit(self._resolve_album, file_path)
             
-            # 确保相册存在
-            if game_name not in self.albums:
-                album_id = self.create_album(game_name)
-                if not album_id:
-                    print(f'创建相册失败: {game_name}')
-                    return False
+            # 上传图片
+            upload_token = self._upload_media(file_path)
             
-            # 获取相册ID
-            album_id = self.albums[game_name]
+            game_name, album_id = album_future.result() if album_future else album
+            if not album_id:
+                return False
             
             # 获取文件名
             file_name = os.path.basename(file_path)
             
-            # 上传图片
-            upload_token = self._upload_media(file_path)
-            if upload_token:
-                # 添加到相册
+            if upload_token and self._create_media_item(game_name, album_id, file_name, upload_token):
+                return True
+            # 没有添加成功，归还预留的相册容量
+            self.album_index.release(album_id, 1)
+            
+        except Exception as e:
+            print(f'上传截图时出错: {e}')
+        return False
+
+    def _create_media_item(self, game_name, album_id, file_name, upload_token):
+        """把单个已上传的文件添加到相册"""
+        try:
+            result = self.service.mediaItems().batchCreate(
+                body={
+                    'albumId': album_id,
+                    'newMediaItems': [{
+                        'description': f'Screenshot from {game_name}',
+                        'simpleMediaItem': {
+                            'fileName': file_name,
+                            'uploadToken': upload_token
+                        }
+                    }]
+                }
+            ).execute(http=self._http())
+        except Exception as e:
+            print(f'上传截图时出错: {e}')
+            return False
+        
+        # 检查上传结果
+        if 'newMediaItemResults' in result:
+            item_result = result['newMediaItemResults'][0]
+            if 'mediaItem' in item_result:
+                print(f'成功上传截图到相册: {game_name}')
+                print(f'图片链接: {item_result["mediaItem"]["productUrl"]}')
+                return True
+            print(f'上传失败: {item_result.get("status", {}).get("message", "未知错误")}')
+        else:
+            print('上传失败: 未收到预期的响应')
+        return False
+
+    def upload_screenshots(self, file_paths):
+        """
+        批量上传截图：按游戏分组，逐个上传文件后每 50 个调用一次 batchCreate
+
+        Returns:
+            list: 成功上传的文件路径
+        """
+        groups = {}
+        for file_path in file_paths:
+            groups.setdefault(self.resolve_game_name(file_path), []).append(file_path)
+
+        created = []
+        for game_name, paths in groups.items():
+            uploads = []
+            for file_path in paths:
+                upload_token = self._upload_media(file_path)
+                if upload_token:
+                    uploads.append((file_path, upload_token))
+            created.extend(self.create_media_items(game_name, uploads))
+        return created
+
+    def create_media_items(self, game_name, uploads):
+        """
+        把已上传的文件批量添加到游戏相册
+
+        Args:
+            game_name (str): 游戏名称（相册标题）
+            uploads (list): [(file_path, upload_token), ...]
+
+        Returns:
+            list: 成功创建媒体项的文件路径
+        """
+        if not uploads:
+            return []
+
+        created = []
+        for start in range(0, len(uploads), BATCH_CREATE_LIMIT):
+            chunk = uploads[start:start + BATCH_CREATE_LIMIT]
+            # 每批单独选择相册，批量导入过程中相册满了也能切换到新相册
+            album_id = self._ensure_album(game_name, len(chunk))
+            if not album_id:
+                continue
+            try:
                 result = self.service.mediaItems().batchCreate(
                     body={
                         'albumId': album_id,
                         'newMediaItems': [{
                             'description': f'Screenshot from {game_name}',
                             'simpleMediaItem': {
-                                'fileName': file_name,
+                                'fileName': os.path.basename(file_path),
                                 'uploadToken': upload_token
                             }
-                        }]
+                        } for file_path, upload_token in chunk]
                     }
-                ).execute()
-                
-                # 检查上传结果
-                if 'newMediaItemResults' in result:
-                    item_result = result['newMediaItemResults'][0]
-                    if 'mediaItem' in item_result:
-                        print(f'成功上传截图到相册: {game_name}')
-                        print(f'图片链接: {item_result["mediaItem"]["productUrl"]}')
-                        return True
-                    else:
-                        print(f'上传失败: {item_result.get("status", {}).get("message", "未知错误")}')
+                ).execute(http=self._http())
+            except Exception as e:
+                print(f'批量添加到相册时出错: {e}')
+                self.album_index.release(album_id, len(chunk))
+                continue
+
+            succeeded = 0
+            for (file_path, _), item_result in zip(chunk, result.get('newMediaItemResults', [])):
+                if 'mediaItem' in item_result:
+                    created.append(file_path)
+                    succeeded += 1
                 else:
-                    print('上传失败: 未收到预期的响应')
-            
-        except Exception as e:
-            print(f'上传截图时出错: {e}')
-        return False
+                    print(f'上传失败: {file_path} - {item_result.get("status", {}).get("message", "未知错误")}')
+            self.album_index.release(album_id, len(chunk) - succeeded)
+        print(f'成功上传 {len(created)}/{len(uploads)} 张截图到相册: {game_name}')
+        return created
 
     def _upload_media(self, file_path):
         """上传媒体文件并获取上传token"""
@@ -206,7 +473,7 @@ class GooglePhotosUploader:
             upload_url = 'https://photoslibrary.googleapis.com/v1/uploads'
             
             with open(file_path, 'rb') as file:
-                response, content = self.service._http.request(
+                response, content = self._http().request(
                     upload_url,
                     method='POST',
                     body=file.read(),